@@ -1,19 +1,24 @@
 import os
 import secrets
-import json
 import asyncio
 import aiosqlite
+import orjson
 import base64
 import time
-from typing import Dict, List, Optional, Any, Tuple
+import logging
+import queue
+import functools
+import weakref
+from typing import Dict, Optional, Any, Tuple
 from datetime import datetime, timedelta
 from collections import defaultdict, deque
+from dataclasses import dataclass, field
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from logging.handlers import QueueHandler, QueueListener
 from fastapi import FastAPI, HTTPException, Depends, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, RedirectResponse
-from pydantic import BaseModel, Field, validator
 from dotenv import load_dotenv
 from openai import AsyncOpenAI
 from google.auth.transport import requests as google_requests
@@ -24,11 +29,29 @@ from googleapiclient.errors import HttpError
 import httpx
 
 # Import OpenAI Realtime Proxy
-from realtime_proxy import OpenAIRealtimeProxy
+from realtime_proxy import OpenAIListenerClosedError, OpenAIRealtimeProxy, json_dumps, openai_pool
+from schemas import (
+    MAX_MESSAGES, MAX_RECIPIENTS, MAX_LABELS_OP,
+    SearchMessagesArgs, GetThreadArgs, SummarizeMessagesArgs, SummarizeThreadArgs,
+    CategorizeUnreadArgs, CreateDraftArgs, SendDraftArgs, ScheduleSendArgs,
+    ModifyLabelsArgs, BulkDeleteArgs, MarkReadArgs, CreateCalendarEventArgs,
+)
 
 # Load environment variables
 load_dotenv()
 
+# Logging - records are queued by the event loop and written out by a background
+# listener thread (started in startup_event), so stdout I/O never blocks request handling
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_log_stream_handler = logging.StreamHandler()
+_log_stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+log_listener = QueueListener(log_queue, _log_stream_handler)
+_log_queue_handler = QueueHandler(log_queue)
+_log_queue_handler.setFormatter(logging.Formatter("%(message)s"))  # Final formatting happens in the listener
+logging.basicConfig(level=LOG_LEVEL, handlers=[_log_queue_handler])
+logger = logging.getLogger(__name__)
+
 # Configuration
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
 GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
@@ -41,11 +64,10 @@ REDIRECT_URI = os.getenv("REDIRECT_URI", "http://localhost:8000/oauth2callback")
 
 # Validate required environment variables
 if not all([GOOGLE_CLIENT_ID, GOOGLE_CLIENT_SECRET, OPENAI_API_KEY]):
-    print("❌ Missing required environment variables!")
-    print("Please ensure these are set in your .env file:")
-    print("- GOOGLE_CLIENT_ID")
-    print("- GOOGLE_CLIENT_SECRET") 
-    print("- OPENAI_API_KEY")
+    logger.error("❌ Missing required environment variables! Set GOOGLE_CLIENT_ID, GOOGLE_CLIENT_SECRET and OPENAI_API_KEY in your .env file")
+    # The listener only starts in startup_event - run it once so the queued record is written
+    log_listener.start()
+    log_listener.stop()
     exit(1)
 
 # Initialize OpenAI
@@ -62,14 +84,13 @@ SCOPES = [
 ]
 
 # Guard rails
-MAX_MESSAGES = 50
 MAX_THREADS = 20
-MAX_RECIPIENTS = 10
-MAX_LABELS_OP = 100
 GMAIL_TIMEOUT = 8.0
 CACHE_DB_PATH = "gmail_cache.db"
 MAX_CACHE_SIZE_MB = 10
 CACHE_EXPIRY_SECONDS = 300  # 5 minutes
+PROXY_CLEANUP_TIMEOUT = 2.0  # Max seconds to wait for the OpenAI close handshake on teardown
+PROXY_RESUME_TTL = 10.0  # Seconds an OpenAI session is kept open for a dropped client to reconnect
 
 # Issue 6 Fix: Enhanced memory management
 MAX_FUNCTION_RESULT_SIZE = 4000  # Consistent truncation for all functions
@@ -105,10 +126,10 @@ allowed_origins = [cors_origin]
 if cors_origin != "http://localhost:5173":
     allowed_origins.append("http://localhost:5173")  # Allow localhost for development
 
-print(f"🚀 CORS Configuration:")
-print(f"   Frontend URL (OAuth): {FRONTEND_URL}")
-print(f"   CORS Origin (Browser): {cors_origin}")
-print(f"   Allowed Origins: {allowed_origins}")
+logger.info("🚀 CORS Configuration:")
+logger.info("   Frontend URL (OAuth): %s", FRONTEND_URL)
+logger.info("   CORS Origin (Browser): %s", cors_origin)
+logger.info("   Allowed Origins: %s", allowed_origins)
     
 app.add_middleware(
     CORSMiddleware,
@@ -119,10 +140,19 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
+@dataclass(slots=True)
+class VoiceSession:
+    """A user's live voice connection - the frontend socket and its OpenAI proxy"""
+    websocket: WebSocket
+    proxy: Optional[OpenAIRealtimeProxy] = None
+    created_at: float = field(default_factory=time.time)
+
 # In-memory storage
 sessions: Dict[str, Dict] = {}
-active_websockets: Dict[str, WebSocket] = {}
-active_proxies: Dict[str, OpenAIRealtimeProxy] = {}  # Store proxy instances per user
+voice_sessions: Dict[str, VoiceSession] = {}  # One live voice connection per user
+pending_resumes: Dict[str, Tuple[OpenAIRealtimeProxy, asyncio.TimerHandle]] = {}  # Proxies kept warm after a client drop
+background_tasks: set = set()  # Strong refs for fire-and-forget tasks
+gmail_services: Dict[str, Tuple[Credentials, Any]] = {}  # Per-user Gmail client, reused across tool calls
 
 # Issue 9 Fix: Rate limiting storage (with daily voice session limits)
 rate_limit_data: Dict[str, Dict[str, Any]] = defaultdict(lambda: {
@@ -146,71 +176,6 @@ memory_usage_tracker = {
 
 
 
-# Pydantic models for Gmail helpers
-class SearchMessagesArgs(BaseModel):
-    query: str
-    max_results: int = Field(default=20, le=MAX_MESSAGES)
-    include_body: bool = False
-
-class GetThreadArgs(BaseModel):
-    thread_id: str
-    include_body: bool = True
-
-class SummarizeMessagesArgs(BaseModel):
-    message_ids: List[str] = Field(max_items=MAX_MESSAGES)
-
-class SummarizeThreadArgs(BaseModel):
-    thread_id: str
-
-class CategorizeUnreadArgs(BaseModel):
-    max_results: int = Field(default=30, le=MAX_MESSAGES)
-
-class CreateDraftArgs(BaseModel):
-    to: List[str] = Field(max_items=MAX_RECIPIENTS)
-    cc: List[str] = Field(default=[], max_items=MAX_RECIPIENTS)
-    bcc: List[str] = Field(default=[], max_items=MAX_RECIPIENTS)
-    subject: str
-    body_markdown: str
-    reply_to_thread_id: Optional[str] = None
-    send: bool = False
-    
-    @validator('to', 'cc', 'bcc')
-    def validate_emails(cls, v):
-        for email in v:
-            if '@' not in email:
-                raise ValueError(f"Invalid email: {email}")
-        return v
-
-class SendDraftArgs(BaseModel):
-    draft_id: str
-
-class ScheduleSendArgs(BaseModel):
-    draft_id: str
-    send_at_epoch_ms: int
-    
-    @validator('send_at_epoch_ms')
-    def validate_future_time(cls, v):
-        if v < int(time.time() * 1000):
-            raise ValueError("INVALID_TIME: Schedule time must be in the future")
-        return v
-
-class ModifyLabelsArgs(BaseModel):
-    msg_ids: List[str] = Field(max_items=MAX_LABELS_OP)
-    add: List[str] = Field(default=[])
-    remove: List[str] = Field(default=[])
-
-class BulkDeleteArgs(BaseModel):
-    msg_ids: List[str] = Field(max_items=100)
-
-class MarkReadArgs(BaseModel):
-    msg_ids: List[str] = Field(max_items=MAX_LABELS_OP)
-
-class CreateCalendarEventArgs(BaseModel):
-    title: str
-    start_epoch_ms: int
-    end_epoch_ms: int
-    attendees: List[str] = Field(default=[])
-
 # Issue 9 Fix: Rate limiting functions (with daily limits)
 def check_rate_limit(user_id: str, limit_type: str, limit_per_minute: int, limit_per_day: int = None) -> bool:
     """Check if user has exceeded rate limit for given type (both minute and daily)"""
@@ -226,11 +191,11 @@ def check_rate_limit(user_id: str, limit_type: str, limit_per_minute: int, limit
             'gmail_calls': 0,
             'date': today
         }
-        print(f"🗓️ Daily limits reset for user {user_id}")
+        logger.info("🗓️ Daily limits reset for user %s", user_id)
     
     # Check daily limit first (if specified)
     if limit_per_day and user_limits['daily_counts'][limit_type] >= limit_per_day:
-        print(f"🚫 Daily limit exceeded for {user_id}: {user_limits['daily_counts'][limit_type]}/{limit_per_day} {limit_type}")
+        logger.warning("🚫 Daily limit exceeded for %s: %s/%s %s", user_id, user_limits['daily_counts'][limit_type], limit_per_day, limit_type)
         return False
     
     # Clean old entries (older than rate limit window)
@@ -240,7 +205,7 @@ def check_rate_limit(user_id: str, limit_type: str, limit_per_minute: int, limit
     
     # Check per-minute limit
     if len(limit_deque) >= limit_per_minute:
-        print(f"🚫 Per-minute limit exceeded for {user_id}: {len(limit_deque)}/{limit_per_minute} {limit_type}")
+        logger.warning("🚫 Per-minute limit exceeded for %s: %s/%s %s", user_id, len(limit_deque), limit_per_minute, limit_type)
         return False
     
     # Add current request to both minute and daily counters
@@ -281,7 +246,7 @@ def check_voice_session_limit(user_id: str) -> Tuple[bool, str]:
             'gmail_calls': 0,
             'date': today
         }
-        print(f"🗓️ Daily limits reset for user {user_id}")
+        logger.info("🗓️ Daily limits reset for user %s", user_id)
     
     # Check voice session daily limit
     if user_data['daily_counts']['voice_sessions'] >= RATE_LIMIT_VOICE_SESSIONS_PER_DAY:
@@ -298,39 +263,44 @@ def increment_voice_session(user_id: str) -> int:
     return user_data['daily_counts']['voice_sessions']
 
 # Issue 6 Fix: Memory management functions
-def truncate_large_result(result: Any, max_size: int = MAX_FUNCTION_RESULT_SIZE) -> str:
-    """Consistently truncate large results to prevent memory issues"""
-    result_str = json.dumps(result, default=str)
+def truncate_large_result(result: Any, max_size: int = MAX_FUNCTION_RESULT_SIZE, result_str: Optional[str] = None) -> str:
+    """Consistently truncate large results to prevent memory issues.
+    
+    Pass result_str when the caller has already serialized result, so it is not serialized twice.
+    Oversized message lists are trimmed in place - callers must not reuse result afterwards.
+    """
+    if result_str is None:
+        result_str = json_dumps(result)
     
     if len(result_str) <= max_size:
         return result_str
     
     # Try intelligent truncation for common data structures
     if isinstance(result, dict):
-        if 'messages' in result and isinstance(result['messages'], list):
+        messages = result.get('messages')
+        if isinstance(messages, list):
             # Truncate email messages intelligently
-            truncated_result = result.copy()
-            truncated_messages = []
+            budget = max_size * 0.8  # Leave some room
+            current_size = len('{"messages":[]}')
+            kept = len(messages)
             
-            for msg in result['messages']:
-                truncated_msg = msg.copy() if isinstance(msg, dict) else msg
-                if isinstance(truncated_msg, dict):
+            for i, msg in enumerate(messages):
+                if isinstance(msg, dict):
                     # Truncate email body
-                    if 'body' in truncated_msg and len(str(truncated_msg['body'])) > 500:
-                        truncated_msg['body'] = str(truncated_msg['body'])[:500] + '... (truncated)'
+                    if 'body' in msg and len(str(msg['body'])) > 500:
+                        msg['body'] = str(msg['body'])[:500] + '... (truncated)'
                     # Truncate snippet
-                    if 'snippet' in truncated_msg and len(str(truncated_msg['snippet'])) > 200:
-                        truncated_msg['snippet'] = str(truncated_msg['snippet'])[:200] + '...'
-                
-                truncated_messages.append(truncated_msg)
+                    if 'snippet' in msg and len(str(msg['snippet'])) > 200:
+                        msg['snippet'] = str(msg['snippet'])[:200] + '...'
                 
-                # Check if we're within size limit
-                current_size = len(json.dumps({'messages': truncated_messages}, default=str))
-                if current_size > max_size * 0.8:  # Leave some room
+                # Track the running size per message instead of re-serializing the whole list
+                current_size += len(json_dumps(msg)) + 1
+                if current_size > budget:
+                    kept = i + 1
                     break
             
-            truncated_result['messages'] = truncated_messages
-            result_str = json.dumps(truncated_result, default=str)
+            del messages[kept:]
+            result_str = json_dumps(result)
     
     # Final truncation if still too large
     if len(result_str) > max_size:
@@ -352,10 +322,29 @@ def cleanup_memory_usage() -> None:
     # Cleanup rate limit data
     cleanup_rate_limit_data()
     
+    # Expired sessions only go away when next used - sweep the ones nobody came back to
+    cleanup_expired_sessions()
+    
     # Log memory stats
-    print(f"🧹 Memory cleanup: {memory_usage_tracker['function_calls']} function calls processed")
+    logger.info("🧹 Memory cleanup: %s function calls processed", memory_usage_tracker['function_calls'])
     memory_usage_tracker['function_calls'] = 0
 
+def cleanup_expired_sessions() -> None:
+    """Drop expired sessions, along with Gmail clients no live session still needs"""
+    now = datetime.now().timestamp()
+    for session_id, session in list(sessions.items()):
+        if session.get("expires_at", 0) < now:
+            del sessions[session_id]
+            release_gmail_service(session.get("user_id"))
+
+def release_gmail_service(user_id: Optional[str]) -> None:
+    """Drop a user's cached Gmail client (and its keep-alive connection) once none of their sessions remain.
+    
+    Not closed explicitly - a tool call may still be using it; the connection closes when it is collected.
+    """
+    if user_id and not any(s.get("user_id") == user_id for s in sessions.values()):
+        gmail_services.pop(user_id, None)
+
 # Initialize SQLite cache
 async def init_cache():
     async with aiosqlite.connect(CACHE_DB_PATH) as db:
@@ -383,7 +372,7 @@ async def cache_get(user_id: str, key: str, custom_expiry: Optional[int] = None)
         if row:
             data, cached_at = row
             if time.time() - cached_at < expiry:
-                return json.loads(data)
+                return orjson.loads(data)
     return None
 
 async def cache_set(user_id: str, key: str, data: Dict):
@@ -392,7 +381,7 @@ async def cache_set(user_id: str, key: str, data: Dict):
         cache_key = f"{user_id}:{key}"
         await db.execute(
             "INSERT OR REPLACE INTO message_cache (cache_key, user_id, data, cached_at) VALUES (?, ?, ?, ?)",
-            (cache_key, user_id, json.dumps(data), int(time.time()))
+            (cache_key, user_id, json_dumps(data), int(time.time()))
         )
         await db.commit()
         
@@ -422,6 +411,7 @@ def get_current_user(request: Request) -> str:
     session = sessions[session_id]
     if session.get("expires_at", 0) < datetime.now().timestamp():
         del sessions[session_id]
+        release_gmail_service(session.get("user_id"))
         raise HTTPException(status_code=401, detail="Session expired")
     
     user_id = session["user_id"]
@@ -438,29 +428,58 @@ def get_current_user(request: Request) -> str:
     
     return user_id
 
+# One lock per Google client transport - httplib2 connections aren't thread-safe
+gmail_http_locks: "weakref.WeakKeyDictionary[Any, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+def gmail_http_lock(http) -> asyncio.Lock:
+    """Return the lock serializing use of one Google client transport"""
+    lock = gmail_http_locks.get(http)
+    if lock is None:
+        lock = gmail_http_locks[http] = asyncio.Lock()
+    return lock
+
+async def gmail_execute(request):
+    """Run a googleapiclient request in a worker thread so its blocking HTTP call never stalls
+    the event loop (and the voice audio relayed on it).
+    
+    Requests sharing a transport - every call for one user's cached service - run one at a time.
+    """
+    async with gmail_http_lock(request.http):
+        return await asyncio.to_thread(request.execute)
+
 # Gmail service helper with token refresh
-def get_gmail_service(user_id: str):
+async def get_gmail_service(user_id: str):
     """Get Gmail service for user with automatic token refresh"""
     session = next((s for s in sessions.values() if s.get("user_id") == user_id), None)
     if not session:
         raise HTTPException(status_code=401, detail="User not found")
     
-    credentials = Credentials(
-        token=session["access_token"],
-        refresh_token=session.get("refresh_token"),
-        token_uri="https://accounts.google.com/o/oauth2/token",
-        client_id=GOOGLE_CLIENT_ID,
-        client_secret=GOOGLE_CLIENT_SECRET
-    )
+    # Reuse the user's client (and its keep-alive HTTPS connection) while the token is unchanged
+    cached = gmail_services.get(user_id)
+    if cached and cached[0].token == session["access_token"]:
+        credentials, service = cached
+    else:
+        credentials = Credentials(
+            token=session["access_token"],
+            refresh_token=session.get("refresh_token"),
+            token_uri="https://accounts.google.com/o/oauth2/token",
+            client_id=GOOGLE_CLIENT_ID,
+            client_secret=GOOGLE_CLIENT_SECRET
+        )
+        service = build("gmail", "v1", credentials=credentials)
+        gmail_services[user_id] = (credentials, service)
     
-    # Refresh token if expired
+    # Refresh token if expired - a blocking HTTPS call, so it runs in a worker thread, and under the
+    # transport lock so it can't swap the token while a gmail_execute call is using these credentials
     if credentials.expired:
-        request = google_requests.Request()
-        credentials.refresh(request)
+        async with gmail_http_lock(service._http):
+            if credentials.expired:  # May have been refreshed while waiting for the lock
+                await asyncio.to_thread(credentials.refresh, google_requests.Request())
         # Update session with new token
         session["access_token"] = credentials.token
     
-    return build("gmail", "v1", credentials=credentials)
+    return service
+
 
 # Gmail helper functions with rate limiting and memory management
 async def search_messages(user_id: str, args: SearchMessagesArgs) -> Dict:
@@ -479,24 +498,24 @@ async def search_messages(user_id: str, args: SearchMessagesArgs) -> Dict:
         return cached
     
     try:
-        service = get_gmail_service(user_id)
-        results = service.users().messages().list(
+        service = await get_gmail_service(user_id)
+        results = await gmail_execute(service.users().messages().list(
             userId='me',
             q=args.query,
             maxResults=args.max_results
-        ).execute()
+        ))
         
         messages = results.get('messages', [])
         message_data = []
         
         for msg in messages:
             try:
-                msg_detail = service.users().messages().get(
+                msg_detail = await gmail_execute(service.users().messages().get(
                     userId='me',
                     id=msg['id'],
                     format='metadata' if not args.include_body else 'full',
                     metadataHeaders=['From', 'To', 'Subject', 'Date']
-                ).execute()
+                ))
                 
                 headers = {h['name']: h['value'] for h in msg_detail.get('payload', {}).get('headers', [])}
                 
@@ -522,7 +541,7 @@ async def search_messages(user_id: str, args: SearchMessagesArgs) -> Dict:
                 
                 message_data.append(msg_info)
             except Exception as e:
-                print(f"Error fetching message {msg['id']}: {e}")
+                logger.warning("Error fetching message %s: %s", msg['id'], e)
                 continue
         
         result = {
@@ -562,12 +581,12 @@ async def list_unread_priority(user_id: str, max_results: int = 20) -> Dict:
 async def get_thread(user_id: str, args: GetThreadArgs) -> Dict:
     """Get full email thread"""
     try:
-        service = get_gmail_service(user_id)
-        thread = service.users().threads().get(
+        service = await get_gmail_service(user_id)
+        thread = await gmail_execute(service.users().threads().get(
             userId='me',
             id=args.thread_id,
             format='full' if args.include_body else 'metadata'
-        ).execute()
+        ))
         
         messages = []
         for msg in thread.get('messages', []):
@@ -598,15 +617,15 @@ async def summarize_messages(user_id: str, args: SummarizeMessagesArgs) -> Dict:
     """Summarize multiple messages using GPT"""
     # First fetch the messages
     messages_data = []
-    service = get_gmail_service(user_id)
+    service = await get_gmail_service(user_id)
     
     for msg_id in args.message_ids[:MAX_MESSAGES]:
         try:
-            msg = service.users().messages().get(
+            msg = await gmail_execute(service.users().messages().get(
                 userId='me',
                 id=msg_id,
                 format='full'
-            ).execute()
+            ))
             
             headers = {h['name']: h['value'] for h in msg.get('payload', {}).get('headers', [])}
             body = extract_body(msg.get('payload', {}))[:50000]  # Limit body size
@@ -618,7 +637,7 @@ async def summarize_messages(user_id: str, args: SummarizeMessagesArgs) -> Dict:
                 'body': body
             })
         except Exception as e:
-            print(f"Error fetching message {msg_id}: {e}")
+            logger.warning("Error fetching message %s: %s", msg_id, e)
     
     if not messages_data:
         return {'summary': 'No messages found to summarize'}
@@ -712,7 +731,7 @@ async def create_draft(user_id: str, args: CreateDraftArgs) -> Dict:
         raise ValueError(f"RECIPIENT_LIMIT: Maximum {MAX_RECIPIENTS} recipients allowed")
     
     try:
-        service = get_gmail_service(user_id)
+        service = await get_gmail_service(user_id)
         
         # Create message
         message = MIMEText(args.body_markdown)
@@ -730,10 +749,10 @@ async def create_draft(user_id: str, args: CreateDraftArgs) -> Dict:
         if args.reply_to_thread_id:
             body['message']['threadId'] = args.reply_to_thread_id
         
-        draft = service.users().drafts().create(
+        draft = await gmail_execute(service.users().drafts().create(
             userId='me',
             body=body
-        ).execute()
+        ))
         
         result = {
             'id': draft['id'],
@@ -758,11 +777,11 @@ async def create_draft(user_id: str, args: CreateDraftArgs) -> Dict:
 async def send_draft(user_id: str, args: SendDraftArgs) -> Dict:
     """Send a draft"""
     try:
-        service = get_gmail_service(user_id)
-        result = service.users().drafts().send(
+        service = await get_gmail_service(user_id)
+        result = await gmail_execute(service.users().drafts().send(
             userId='me',
             body={'id': args.draft_id}
-        ).execute()
+        ))
         
         return {
             'id': result['id'],
@@ -788,7 +807,7 @@ async def modify_labels(user_id: str, args: ModifyLabelsArgs) -> Dict:
         raise ValueError(f"TOO_MANY_ITEMS: Maximum {MAX_LABELS_OP} messages per operation")
     
     try:
-        service = get_gmail_service(user_id)
+        service = await get_gmail_service(user_id)
         
         # Process in batches of 50 (Gmail API limit)
         modified = 0
@@ -801,10 +820,10 @@ async def modify_labels(user_id: str, args: ModifyLabelsArgs) -> Dict:
                 'removeLabelIds': args.remove
             }
             
-            result = service.users().messages().batchModify(
+            result = await gmail_execute(service.users().messages().batchModify(
                 userId='me',
                 body=body
-            ).execute()
+            ))
             
             modified += len(batch)
         
@@ -822,16 +841,16 @@ async def bulk_delete(user_id: str, args: BulkDeleteArgs) -> Dict:
         raise ValueError("TOO_MANY_ITEMS: Maximum 100 messages per delete operation")
     
     try:
-        service = get_gmail_service(user_id)
+        service = await get_gmail_service(user_id)
         
         # Gmail doesn't have batch delete, so we batch trash instead
         trashed = 0
         for msg_id in args.msg_ids:
             try:
-                service.users().messages().trash(userId='me', id=msg_id).execute()
+                await gmail_execute(service.users().messages().trash(userId='me', id=msg_id))
                 trashed += 1
             except Exception as e:
-                print(f"Error trashing message {msg_id}: {e}")
+                logger.warning("Error trashing message %s: %s", msg_id, e)
         
         return {
             'trashed': trashed,
@@ -871,18 +890,18 @@ async def count_unread_emails(user_id: str) -> Dict:
     cache_key = f"count_unread:{user_id}"
     cached_result = await cache_get(user_id, cache_key, 10)  # 10-second cache for speed
     if cached_result:
-        print(f"⚡ Using cached unread count for INSTANT speed boost")
+        logger.debug("⚡ Using cached unread count for INSTANT speed boost")
         return cached_result
     
     try:
-        service = get_gmail_service(user_id)
+        service = await get_gmail_service(user_id)
         
         # Get unread messages - use higher limit to get accurate count
-        result = service.users().messages().list(
+        result = await gmail_execute(service.users().messages().list(
             userId='me',
             q="is:unread",
             maxResults=500
-        ).execute()
+        ))
         
         actual_count = len(result.get('messages', []))
         
@@ -934,6 +953,16 @@ def extract_body(payload: Dict) -> str:
     
     return body
 
+def _as_async(func):
+    """Return func as a coroutine function so callers can always await it"""
+    if asyncio.iscoroutinefunction(func):
+        return func
+    
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+    return wrapper
+
 # Function mapping for WebSocket - extract only the functions for realtime proxy
 GMAIL_FUNCTIONS_WITH_ARGS = {
     "search_messages": (search_messages, SearchMessagesArgs),
@@ -954,9 +983,24 @@ GMAIL_FUNCTIONS_WITH_ARGS = {
     "abort_current_action": (abort_current_action, None),
     "narrow_scope_request": (narrow_scope_request, None)
 }
+# Normalize once at registration so call sites never need to check for sync functions, and bind
+# each model's compiled pydantic-core validators so argument parsing is a single direct call
+GMAIL_FUNCTIONS_WITH_ARGS = {
+    name: (
+        _as_async(func),
+        args_model.__pydantic_validator__.validate_python if args_model else None,
+        args_model.__pydantic_validator__.validate_json if args_model else None,
+    )
+    for name, (func, args_model) in GMAIL_FUNCTIONS_WITH_ARGS.items()
+}
 
 # Extract just the functions for the realtime proxy
-GMAIL_FUNCTIONS = {name: func for name, (func, _) in GMAIL_FUNCTIONS_WITH_ARGS.items()}
+GMAIL_FUNCTIONS = {name: func for name, (func, *_) in GMAIL_FUNCTIONS_WITH_ARGS.items()}
+GMAIL_FUNCTION_NAMES = frozenset(GMAIL_FUNCTIONS_WITH_ARGS)
+
+# Constant replies for unknown function names - nothing is built per bad request
+_UNKNOWN_FUNCTION_FRAME = json_dumps({"type": "error", "error": "Unknown function"})
+_UNKNOWN_FUNCTION_RESPONSE = JSONResponse({"detail": "Function not found"}, status_code=404)
 
 # Routes
 @app.get("/")
@@ -1008,10 +1052,11 @@ async def logout(request: Request):
     if session_id and session_id in sessions:
         # Remove from active websockets
         user_id = sessions[session_id].get("user_id")
-        if user_id in active_websockets:
-            del active_websockets[user_id]
+        voice_sessions.pop(user_id, None)
+        drop_resumable_proxy(user_id)
         # Remove session
         del sessions[session_id]
+        release_gmail_service(user_id)
     
     # Clear cookie with same settings
     response = JSONResponse({"success": True, "message": "Logged out successfully"})
@@ -1107,7 +1152,7 @@ async def oauth2callback(request: Request, code: str, state: str):
     
     # Get user info
     service = build("oauth2", "v2", credentials=credentials)
-    user_info = service.userinfo().get().execute()
+    user_info = await gmail_execute(service.userinfo().get())
     user_id = user_info["id"]
     
     # Create new session ID for the authenticated session
@@ -1139,130 +1184,197 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
     
     user_id = sessions[session_id]["user_id"]
     
-    # 🛡️ CRITICAL: Check daily voice session limit (main cost protection)
-    can_proceed, error_message = check_voice_session_limit(user_id)
-    if not can_proceed:
-        await websocket.send_json({
-            "type": "error",
-            "error": {
-                "message": error_message,
-                "code": "DAILY_VOICE_LIMIT_EXCEEDED"
-            }
-        })
-        await websocket.close(code=4003, reason="Daily voice limit exceeded")
-        return
+    # A client reconnecting shortly after a drop picks its OpenAI session back up
+    proxy = take_resumable_proxy(user_id)
     
-    # Increment voice session counter
-    current_count = increment_voice_session(user_id)
-    print(f"🎙️ Voice session {current_count}/{RATE_LIMIT_VOICE_SESSIONS_PER_DAY} for user {user_id}")
+    if proxy is None:
+        # 🛡️ CRITICAL: Check daily voice session limit (main cost protection)
+        can_proceed, error_message = check_voice_session_limit(user_id)
+        if not can_proceed:
+            await websocket.send_json({
+                "type": "error",
+                "error": {
+                    "message": error_message,
+                    "code": "DAILY_VOICE_LIMIT_EXCEEDED"
+                }
+            })
+            await websocket.close(code=4003, reason="Daily voice limit exceeded")
+            return
+        
+        # Increment voice session counter
+        current_count = increment_voice_session(user_id)
+        logger.info("🎙️ Voice session %s/%s for user %s", current_count, RATE_LIMIT_VOICE_SESSIONS_PER_DAY, user_id)
     
     # Close existing connections for this user
-    if user_id in active_websockets:
-        print(f"🔄 Closing existing WebSocket for user {user_id}")
-        try:
-            await active_websockets[user_id].close(code=1000, reason="New connection replacing old one")
-        except Exception as e:
-            print(f"Error closing old WebSocket: {e}")
-    
-    # Clean up existing proxy
-    if user_id in active_proxies:
-        print(f"🔄 Cleaning up existing proxy for user {user_id}")
-        try:
-            await active_proxies[user_id].cleanup()
-        except Exception as e:
-            print(f"Error cleaning up proxy: {e}")
-        del active_proxies[user_id]
+    old_session = voice_sessions.pop(user_id, None)
+    if old_session:
+        logger.info("🔄 Replacing existing connection for user %s", user_id)
+        await close_voice_connection(old_session.websocket, old_session.proxy, reason="New connection replacing old one")
     
     # Store the new connection
-    active_websockets[user_id] = websocket
-    print(f"✅ WebSocket connected for user {user_id}")
+    voice_session = VoiceSession(websocket)
+    voice_sessions[user_id] = voice_session
+    logger.info("✅ WebSocket connected for user %s", user_id)
     
-    # Create and start OpenAI Realtime Proxy
-    proxy = None
+    proxy_started = False
+    client_dropped = False
     try:
-        proxy = OpenAIRealtimeProxy(GMAIL_FUNCTIONS)
-        active_proxies[user_id] = proxy
-        
-        # Start the proxy (connects to OpenAI)
-        proxy_started = await proxy.start_proxy(websocket, user_id)
+        if proxy:
+            # Resume the kept-alive session - skips the OpenAI handshake and session.update
+            proxy.rebind(websocket)
+            voice_session.proxy = proxy
+            proxy_started = True
+            logger.info("⏯️ Resumed OpenAI Realtime session for user %s", user_id)
+            await proxy.notify_session_ready()
+        else:
+            # Create and start OpenAI Realtime Proxy
+            proxy = OpenAIRealtimeProxy(GMAIL_FUNCTIONS, truncate_large_result)
+            voice_session.proxy = proxy
+            
+            # Start the proxy (connects to OpenAI)
+            proxy_started = await proxy.start_proxy(websocket, user_id)
+            if proxy_started:
+                logger.info("🎙️ OpenAI Realtime Proxy started for user %s", user_id)
         
         if proxy_started:
-            print(f"🎙️ OpenAI Realtime Proxy started for user {user_id}")
-            
-            # Handle messages from frontend
-            while True:
-                data = await websocket.receive_text()
-                message = json.loads(data)
-                
-                # Check if it's a direct function call (for backward compatibility/testing)
-                if message.get("type") == "function_call":
-                    # Handle direct function calls for testing
-                    await handle_direct_function_call(websocket, user_id, message)
-                else:
-                    # Forward all other messages to OpenAI proxy
-                    await proxy.handle_client_message(message)
+            # Run the OpenAI listener watch, the frontend writer and the frontend receive loop
+            # together - if any fails (or the OpenAI listener stops), the task group cancels the
+            # others deterministically
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(proxy.wait_listener())
+                tg.create_task(proxy.write_to_client())
+                tg.create_task(receive_client_messages(websocket, user_id, proxy))
         else:
             # Fallback to direct mode if OpenAI connection fails
-            print(f"⚠️ OpenAI connection failed for user {user_id}, falling back to direct mode")
+            logger.warning("⚠️ OpenAI connection failed for user %s, falling back to direct mode", user_id)
             await websocket.send_json({
                 "type": "system",
                 "message": "Connected in direct mode (OpenAI unavailable)"
             })
             
             # Handle messages in direct mode
-            while True:
-                data = await websocket.receive_text()
-                message = json.loads(data)
-                
-                if message.get("type") == "function_call":
-                    await handle_direct_function_call(websocket, user_id, message)
-                else:
-                    # Echo for testing
-                    await websocket.send_json({
-                        "type": "echo",
-                        "data": message
-                    })
-    
-    except WebSocketDisconnect:
-        print(f"🔌 WebSocket disconnected for user {user_id}")
-    except Exception as e:
-        print(f"❌ WebSocket error for user {user_id}: {e}")
+            await receive_client_messages(websocket, user_id, None)
+    
+    except* WebSocketDisconnect:
+        logger.info("🔌 WebSocket disconnected for user %s", user_id)
+        client_dropped = True
+    except* OpenAIListenerClosedError:
+        logger.warning("🔌 OpenAI session ended for user %s - closing frontend connection", user_id)
+    except* Exception as eg:
+        for e in eg.exceptions:
+            logger.error("❌ WebSocket error for user %s: %s", user_id, e)
     finally:
-        # Cleanup
-        if user_id in active_websockets and active_websockets[user_id] == websocket:
-            del active_websockets[user_id]
-            print(f"🧹 Cleaned up WebSocket for user {user_id}")
+        # Cleanup - only release the slot if it still belongs to this connection
+        owned = voice_sessions.get(user_id) is voice_session
+        if owned:
+            del voice_sessions[user_id]
         
-        if user_id in active_proxies:
-            try:
-                await active_proxies[user_id].cleanup()
-            except Exception as e:
-                print(f"Error cleaning up proxy: {e}")
-            del active_proxies[user_id]
-            print(f"🧹 Cleaned up proxy for user {user_id}")
+        if owned and client_dropped and proxy_started and proxy.is_connected:
+            # Keep the OpenAI session warm so a quick reconnect can resume it
+            hold_proxy_for_resume(user_id, proxy)
+            await close_voice_connection(websocket, None)
+            logger.info("⏸️ Holding OpenAI session for user %s for %ss", user_id, PROXY_RESUME_TTL)
+        else:
+            await close_voice_connection(websocket, proxy)
+            logger.info("🧹 Cleaned up WebSocket and proxy for user %s", user_id)
         
         # Issue 6 Fix: Cleanup memory when websocket disconnects
         cleanup_memory_usage()
 
+async def receive_client_messages(websocket: WebSocket, user_id: str, proxy: Optional[OpenAIRealtimeProxy]):
+    """Receive frontend messages and route them to the proxy (or echo them in direct mode)"""
+    while True:
+        frame = await websocket.receive()
+        if frame["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(frame.get("code", 1000), frame.get("reason"))
+        
+        # Binary frames are raw PCM16 audio - skip JSON entirely
+        data = frame.get("text")
+        if data is None:
+            if proxy and frame.get("bytes"):
+                await proxy.handle_client_audio(frame["bytes"])
+            continue
+        
+        message = orjson.loads(data)
+        
+        # Check if it's a direct function call (for backward compatibility/testing)
+        if message.get("type") == "function_call":
+            await handle_direct_function_call(websocket, user_id, message)
+        elif proxy:
+            # Forward all other messages to OpenAI proxy
+            await proxy.handle_client_message(message, data)
+        else:
+            # Echo for testing
+            await websocket.send_json({
+                "type": "echo",
+                "data": message
+            })
+
+def hold_proxy_for_resume(user_id: str, proxy: OpenAIRealtimeProxy):
+    """Keep a proxy's OpenAI session open for PROXY_RESUME_TTL seconds after its client dropped"""
+    drop_resumable_proxy(user_id)
+    proxy.detach()  # No writer drains the queue until a client resumes
+    expiry = asyncio.get_running_loop().call_later(PROXY_RESUME_TTL, drop_resumable_proxy, user_id)
+    pending_resumes[user_id] = (proxy, expiry)
+
+def take_resumable_proxy(user_id: str) -> Optional[OpenAIRealtimeProxy]:
+    """Claim the user's held proxy, if it is still connected to OpenAI"""
+    entry = pending_resumes.pop(user_id, None)
+    if entry is None:
+        return None
+    
+    proxy, expiry = entry
+    expiry.cancel()
+    if not proxy.is_connected:
+        spawn_background(proxy.cleanup())
+        return None
+    return proxy
+
+def drop_resumable_proxy(user_id: str):
+    """Close the user's held proxy (if any) in the background"""
+    entry = pending_resumes.pop(user_id, None)
+    if entry is not None:
+        proxy, expiry = entry
+        expiry.cancel()
+        spawn_background(proxy.cleanup())
+
+def spawn_background(coro):
+    """Run a coroutine as a fire-and-forget task, keeping a reference until it finishes"""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+async def close_voice_connection(websocket: Optional[WebSocket], proxy: Optional[OpenAIRealtimeProxy], reason: Optional[str] = None):
+    """Close the frontend WebSocket and the OpenAI connection concurrently.
+    
+    Proxy cleanup is shielded and bounded by PROXY_CLEANUP_TIMEOUT so a slow OpenAI close
+    handshake can't hold the user's slot; it keeps running in the background on timeout.
+    """
+    closers = []
+    if websocket:
+        closers.append(websocket.close(code=1000, reason=reason))
+    if proxy:
+        closers.append(asyncio.wait_for(asyncio.shield(proxy.cleanup()), timeout=PROXY_CLEANUP_TIMEOUT))
+    
+    results = await asyncio.gather(*closers, return_exceptions=True)
+    
+    # The client socket is usually already gone - only proxy failures are worth reporting
+    if proxy and isinstance(results[-1], Exception):
+        logger.warning("Error cleaning up proxy: %r", results[-1])
+
 async def handle_direct_function_call(websocket: WebSocket, user_id: str, message: Dict):
     """Handle direct function calls (for backward compatibility and testing)"""
     func_name = message.get("function")
-    if func_name in GMAIL_FUNCTIONS_WITH_ARGS:
+    if func_name in GMAIL_FUNCTION_NAMES:
         try:
-            func, args_model = GMAIL_FUNCTIONS_WITH_ARGS[func_name]
+            func, validate_args, _ = GMAIL_FUNCTIONS_WITH_ARGS[func_name]
             
             # Parse arguments if needed
-            if args_model:
-                args = args_model(**message.get("args", {}))
-                if asyncio.iscoroutinefunction(func):
-                    result = await func(user_id, args)
-                else:
-                    result = func(user_id, args)
+            if validate_args:
+                args = validate_args(message.get("args", {}))
+                result = await func(user_id, args)
             else:
-                if asyncio.iscoroutinefunction(func):
-                    result = await func(user_id)
-                else:
-                    result = func(user_id)
+                result = await func(user_id)
             
             await websocket.send_json({
                 "type": "function_result",
@@ -1286,10 +1398,7 @@ async def handle_direct_function_call(websocket: WebSocket, user_id: str, messag
                 "error": str(e)
             })
     else:
-        await websocket.send_json({
-            "type": "error",
-            "error": f"Unknown function: {func_name}"
-        })
+        await websocket.send_text(_UNKNOWN_FUNCTION_FRAME)
 
 # Test endpoint for Gmail functions
 @app.post("/test/{function_name}")
@@ -1297,18 +1406,18 @@ async def test_function(function_name: str, request: Request):
     """Test Gmail functions via HTTP (for debugging)"""
     user_id = get_current_user(request)
     
-    if function_name not in GMAIL_FUNCTIONS_WITH_ARGS:
-        raise HTTPException(status_code=404, detail=f"Function {function_name} not found")
+    if function_name not in GMAIL_FUNCTION_NAMES:
+        return _UNKNOWN_FUNCTION_RESPONSE
     
-    func, args_model = GMAIL_FUNCTIONS_WITH_ARGS[function_name]
-    body = await request.json() if args_model else {}
+    func, _, validate_args_json = GMAIL_FUNCTIONS_WITH_ARGS[function_name]
     
     try:
-        if args_model:
-            args = args_model(**body)
-            result = await func(user_id, args) if asyncio.iscoroutinefunction(func) else func(user_id, args)
+        if validate_args_json:
+            # Validate straight from the raw body - no intermediate dict
+            args = validate_args_json(await request.body())
+            result = await func(user_id, args)
         else:
-            result = await func(user_id) if asyncio.iscoroutinefunction(func) else func(user_id)
+            result = await func(user_id)
         
         return {"success": True, "result": result}
     except ValueError as e:
@@ -1319,18 +1428,28 @@ async def test_function(function_name: str, request: Request):
 @app.on_event("startup")
 async def startup_event():
     """Initialize cache and systems on startup"""
+    log_listener.start()
     await init_cache()
-    print("✅ Gmail cache initialized")
-    print(f"✅ {len(GMAIL_FUNCTIONS)} Gmail functions available")
-    print("🎙️ OpenAI Realtime API integration ready")
-    print("🔄 Backward compatibility maintained for existing functions")
-    print(f"🛡️ Rate limiting enabled:")
-    print(f"   Per minute: {RATE_LIMIT_REQUESTS_PER_MINUTE} req/min, {RATE_LIMIT_GMAIL_CALLS_PER_MINUTE} Gmail/min, {RATE_LIMIT_OPENAI_CALLS_PER_MINUTE} OpenAI/min")
-    print(f"   Per day: {RATE_LIMIT_REQUESTS_PER_DAY} req/day, {RATE_LIMIT_VOICE_SESSIONS_PER_DAY} voice sessions/day 💰")
-    print(f"🧹 Memory management enabled: {MAX_FUNCTION_RESULT_SIZE}B result limit, {MAX_EMAIL_BODY_SIZE}B email limit")
+    logger.info("✅ Gmail cache initialized")
+    openai_pool.start()
+    logger.info("✅ %s Gmail functions available", len(GMAIL_FUNCTIONS))
+    logger.info("🎙️ OpenAI Realtime API integration ready")
+    logger.info("⚡ Event loop: %s", type(asyncio.get_running_loop()).__module__)
+    logger.info("🔄 Backward compatibility maintained for existing functions")
+    logger.info("🛡️ Rate limiting enabled:")
+    logger.info("   Per minute: %s req/min, %s Gmail/min, %s OpenAI/min", RATE_LIMIT_REQUESTS_PER_MINUTE, RATE_LIMIT_GMAIL_CALLS_PER_MINUTE, RATE_LIMIT_OPENAI_CALLS_PER_MINUTE)
+    logger.info("   Per day: %s req/day, %s voice sessions/day 💰", RATE_LIMIT_REQUESTS_PER_DAY, RATE_LIMIT_VOICE_SESSIONS_PER_DAY)
+    logger.info("🧹 Memory management enabled: %sB result limit, %sB email limit", MAX_FUNCTION_RESULT_SIZE, MAX_EMAIL_BODY_SIZE)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close warm OpenAI sockets and flush queued log records before exit"""
+    await openai_pool.close()
+    log_listener.stop()
 
 
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # Voice traffic is mostly raw PCM - per-message deflate would burn CPU on incompressible frames
+    uvicorn.run(app, host="0.0.0.0", port=port, ws_per_message_deflate=False)
@@ -1,510 +1,747 @@
 import asyncio
-import json
+import binascii
+import logging
+import orjson
 import websockets
 import os
+import random
+import re
+import socket
 import time
-from typing import Optional, Dict, Any
+from collections import deque
+from typing import Optional, Dict, Any, Awaitable, Callable, Deque, List, Set, Tuple, Union
 from dotenv import load_dotenv
+from schemas import ARG_JSON_VALIDATORS, CategorizeUnreadArgs
+
+try:
+    import pybase64 as base64  # SIMD base64 for the per-chunk audio encode/decode, stdlib-compatible API
+except ImportError:
+    import base64
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+class OpenAIListenerClosedError(Exception):
+    """The OpenAI listener stopped on its own - the session it served is over"""
+
+# Gmail functions exposed to OpenAI as tools (static, shared by every session)
+GMAIL_TOOLS = [
+    {
+        "type": "function",
+        "name": "count_unread_emails",
+        "description": "REQUIRED: Call this function whenever user asks 'how many unread emails', 'unread count', 'how many emails', or similar counting questions. Returns exact number of unread emails.",
+        "parameters": {
+            "type": "object",
+            "properties": {},
+            "additionalProperties": False
+        }
+    },
+    {
+        "type": "function",
+        "name": "list_unread",
+        "description": "List actual unread email details (subjects, senders) - use when user wants to see email content",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "max_results": {
+                    "type": "integer",
+                    "description": "Maximum number of emails to return",
+                    "default": 10
+                }
+            },
+            "additionalProperties": False
+        }
+    },
+    {
+        "type": "function", 
+        "name": "search_messages",
+        "description": "Search emails using Gmail search syntax. For important emails, try multiple strategies: 'is:starred' (user-starred), 'from:boss@company.com' (from specific important people), 'subject:urgent OR subject:important' (urgent content), or 'label:important' (Gmail's auto-importance). You can also search by sender names.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "Gmail search query. Examples: 'from:john urgent', 'is:starred', 'label:important', 'subject:invoice'"
+                },
+                "max_results": {
+                    "type": "integer", 
+                    "description": "Maximum number of results to return",
+                    "default": 5
+                }
+            },
+            "required": ["query"],
+            "additionalProperties": False
+        }
+    },
+    {
+        "type": "function",
+        "name": "create_draft",
+        "description": "Create or send email drafts. Use this when user asks to draft, compose, write, or send emails",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "to": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Recipient email addresses"
+                },
+                "subject": {
+                    "type": "string",
+                    "description": "Email subject line"
+                },
+                "body_markdown": {
+                    "type": "string",
+                    "description": "Email body content (can include markdown)"
+                },
+                "send": {
+                    "type": "boolean",
+                    "description": "Whether to send immediately (true) or just create draft (false)",
+                    "default": False
+                },
+                "cc": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "CC recipients",
+                    "default": []
+                }
+            },
+            "required": ["to", "subject", "body_markdown"],
+            "additionalProperties": False
+        }
+    },
+    {
+        "type": "function",
+        "name": "mark_read",
+        "description": "Mark emails as read. Use when user says 'mark as read' or wants to clear unread status",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "msg_ids": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "List of message IDs to mark as read"
+                }
+            },
+            "required": ["msg_ids"],
+            "additionalProperties": False
+        }
+    },
+    {
+        "type": "function",
+        "name": "categorize_unread",
+        "description": "Categorize and analyze unread emails by urgency and type. Use for email organization questions",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "max_results": {
+                    "type": "integer",
+                    "description": "Maximum number of emails to analyze",
+                    "default": 20
+                }
+            },
+            "additionalProperties": False
+        }
+    }
+]
+
+# Realtime session settings - static for the lifetime of the process
+SESSION_CONFIG = {
+    "modalities": ["text", "audio"],
+    "instructions": (
+        "You are VoiceInbox, a helpful Gmail assistant. "
+        "When users ask about their emails, call the appropriate function and then provide a natural, conversational response. "
+        "Be concise but helpful in your audio responses."
+    ),
+    "voice": "alloy",
+    "input_audio_format": "pcm16",
+    "output_audio_format": "pcm16",
+    "input_audio_transcription": {
+        "model": "whisper-1"
+    },
+    "turn_detection": {
+        "type": "server_vad",
+        "threshold": 0.5,
+        "prefix_padding_ms": 200,
+        "silence_duration_ms": 300
+    },
+    "tools": GMAIL_TOOLS,
+    "tool_choice": "auto",
+    "temperature": 0.6,
+    "max_response_output_tokens": 800  # CORRECTED: For session.update use max_response_output_tokens
+}
+
+# Outbound audio coalescing: input_audio_buffer.append chunks arriving within this window
+# are merged into one frame, flushed early once the buffered base64 reaches the size cap
+AUDIO_FLUSH_INTERVAL = 0.01  # seconds
+AUDIO_FLUSH_MAX_BYTES = 32 * 1024
+
+# Frontend-bound frames are queued and written by a single writer task (see write_to_client);
+# when the browser stops reading, audio past the bound is dropped and JSON events apply
+# backpressure to the OpenAI listener
+CLIENT_QUEUE_MAX = 256
+CLIENT_WRITE_BATCH = 8  # Max frames taken off the queue per writer wakeup
+
+OPENAI_REALTIME_URL = "wss://api.openai.com/v1/realtime?model=gpt-4o-mini-realtime-preview-2024-12-17"
+
+# Send buffer for the OpenAI socket - audio bursts to a WAN peer shouldn't stall on a small default
+OPENAI_SNDBUF = 1 << 20
+
+# Pre-connected OpenAI sockets kept ready for new voice sessions (see OpenAIConnectionPool)
+OPENAI_WARM_CONNECTIONS = int(os.getenv("OPENAI_WARM_CONNECTIONS", "1"))
+OPENAI_WARM_MAX_AGE = 600.0  # Seconds an idle warm socket is trusted before it's replaced
+
+# OpenAI reconnect backoff (see _reconnect_delay)
+RECONNECT_BASE_DELAY = 0.5
+RECONNECT_MAX_DELAY = 30.0
+
+def _reconnect_delay(retry_count: int) -> float:
+    """Full-jitter exponential backoff, so proxies dropped by the same outage don't retry in lockstep"""
+    return random.uniform(0, min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * (2 ** retry_count)))
+
+# Tool calls run as tasks so the OpenAI listener keeps relaying audio during Gmail I/O
+FUNCTION_CALL_CONCURRENCY = 8
+
+# OpenAI puts "type" first in every event, so it can be read off the raw frame without parsing;
+# frames that don't match just take the orjson.loads path
+_EVENT_TYPE_RE = re.compile(r'\{\s*"type"\s*:\s*"([^"]+)"')
+_AUDIO_DELTA_RE = re.compile(r'"delta"\s*:\s*"([^"]*)"')
+# Client audio is spliced raw into a JSON string - only plain base64 is safe to splice
+_is_base64 = re.compile(r'[A-Za-z0-9+/]*={0,2}').fullmatch
+
+# Frontend control messages relayed to OpenAI as-is (audio appends are coalesced separately)
+CLIENT_FORWARD_TYPES = frozenset({
+    "input_audio_buffer.commit",
+    "response.create",
+    "conversation.item.create",
+    "response.cancel"
+})
+
+# Events forwarded to the frontend - everything else is dropped to prevent flooding
+FORWARDED_EVENT_TYPES = frozenset({
+    'session.created', 'session.updated', 'system',
+    'response.created', 'response.done', 'error',
+    'response.audio.delta', 'response.audio.done',
+    'response.output_item.added', 'conversation.item.created',
+    'input_audio_buffer.speech_started', 'input_audio_buffer.committed'
+})
+
+# Events the proxy needs to parse: forwarded ones plus those it reacts to itself
+HANDLED_EVENT_TYPES = FORWARDED_EVENT_TYPES | {
+    'conversation.item.input_audio_transcription.completed',
+    'response.function_call_arguments.done'
+}
+
+# Forwarded events the proxy does nothing else with (beyond debug logging) - relayed unparsed
+PASSTHROUGH_EVENT_TYPES = frozenset({
+    'response.audio.done', 'response.output_item.added', 'conversation.item.created'
+})
+
+def json_dumps(obj: Any) -> str:
+    """Serialize obj to a JSON text frame (orjson returns bytes; OpenAI and the frontend want text)"""
+    return orjson.dumps(obj, default=str).decode()
+
+# Pre-serialized session.update frame - sent on every (re)connect, so build it once at import
+_SESSION_UPDATE_FRAME = json_dumps({"type": "session.update", "session": SESSION_CONFIG})
+_SESSION_READY_FRAME = json_dumps({"type": "system", "message": "OpenAI session ready - voice commands enabled"})
+_RESPONSE_CREATE_FRAME = json_dumps({"type": "response.create"})
+_EMERGENCY_RESET_FRAME = json_dumps({
+    "type": "error",
+    "error": {"message": "Response timeout - please try again"},
+    "emergency_reset": True
+})
+
+# input_audio_buffer.append frame split around its payload - base64 needs no JSON escaping, so
+# buffered chunks are spliced straight in rather than joined and run through the serializer
+_AUDIO_APPEND_HEAD = '{"type":"input_audio_buffer.append","audio":"'
+_AUDIO_APPEND_TAIL = '"}'
+
+# Tool-call argument parsers: raw arguments JSON -> positional args after user_id
+def _max_results_args(arguments: str) -> tuple:
+    args = orjson.loads(arguments) if arguments else {}
+    return (args.get('max_results', 20),)
+
+def _no_args(arguments: str) -> tuple:
+    return ()
+
+def _categorize_args(arguments: str) -> tuple:
+    args = orjson.loads(arguments) if arguments else {}
+    return (CategorizeUnreadArgs(max_results=args.get('max_results', 20)),)
+
+def _dict_args(arguments: str) -> tuple:
+    return (orjson.loads(arguments) if arguments else {},)
+
+def _model_args(validate_json: Callable[[str], Any]) -> Callable[[str], tuple]:
+    # Functions with complex args - parse and validate the raw JSON in one step
+    return lambda arguments: (validate_json(arguments or '{}'),)
+
+# Function name -> argument parser, resolved with one lookup per call; anything else gets the raw dict
+FUNCTION_ARG_PARSERS: Dict[str, Callable[[str], tuple]] = {
+    **{name: _model_args(validate_json) for name, validate_json in ARG_JSON_VALIDATORS.items()},
+    'list_unread': _max_results_args,
+    'list_unread_priority': _max_results_args,
+    'categorize_unread': _categorize_args,
+    'abort_current_action': _no_args,
+    'narrow_scope_request': _no_args,
+    'count_unread_emails': _no_args,
+    'get_email_counts': _no_args,
+}
+
+async def open_openai_ws() -> websockets.WebSocketClientProtocol:
+    """Open and tune a new OpenAI Realtime socket"""
+    headers = {
+        "Authorization": f"Bearer {os.getenv('OPENAI_API_KEY')}",
+        "OpenAI-Beta": "realtime=v1"
+    }
+    ws = await websockets.connect(
+        OPENAI_REALTIME_URL,
+        extra_headers=headers,
+        max_size=2**20,     # Largest events (response.done, session.updated) are tens of KB
+        read_limit=2**20,   # Whole audio-delta frames fit without pausing the transport mid-frame
+        write_limit=2**20,  # Merged append frames don't trip drain() on every flush
+        ping_interval=30,  # Send ping every 30 seconds
+        ping_timeout=10,   # Wait 10 seconds for pong
+        close_timeout=10,  # Wait 10 seconds for close
+        compression=None   # Frames are mostly base64 audio - deflate costs CPU for little gain
+    )
+    
+    # Disable Nagle and enlarge the send buffer (best effort)
+    sock = ws.transport.get_extra_info('socket') if ws.transport else None
+    if sock is not None:
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, OPENAI_SNDBUF)
+        except OSError as e:
+            logger.debug("Could not tune OpenAI socket: %s", e)
+    return ws
+
+class OpenAIConnectionPool:
+    """Keeps a few OpenAI sockets connected ahead of time so a new voice session skips the TLS
+    and HTTP upgrade handshakes.
+    
+    Sockets are handed out once and never returned - each Realtime socket is its own session
+    with its own conversation state, so it can't be shared between users.
+    """
+    
+    def __init__(self, size: int, max_age: float = OPENAI_WARM_MAX_AGE):
+        self.size = size
+        self.max_age = max_age
+        self._idle: Deque[Tuple[float, websockets.WebSocketClientProtocol]] = deque()
+        self._fill_task: Optional[asyncio.Task] = None
+        self._closing: Set[asyncio.Task] = set()
+    
+    def start(self):
+        """Begin warming sockets - call from a running event loop"""
+        self._refill()
+    
+    def _refill(self):
+        if self.size > 0 and (self._fill_task is None or self._fill_task.done()):
+            self._fill_task = asyncio.create_task(self._fill())
+    
+    async def _fill(self):
+        while len(self._idle) < self.size:
+            try:
+                ws = await open_openai_ws()
+            except Exception as e:
+                # Don't retry in a loop - the next acquire() tries again
+                logger.warning("⚠️ Could not pre-connect to OpenAI: %s", e)
+                return
+            self._idle.append((time.monotonic(), ws))
+    
+    def _discard(self, ws: websockets.WebSocketClientProtocol):
+        task = asyncio.create_task(ws.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+    
+    async def acquire(self) -> websockets.WebSocketClientProtocol:
+        """Take a warm socket if one is still usable, otherwise connect now"""
+        now = time.monotonic()
+        ws = None
+        while self._idle:
+            opened_at, candidate = self._idle.popleft()
+            if candidate.open and now - opened_at < self.max_age:
+                ws = candidate
+                break
+            self._discard(candidate)
+        
+        self._refill()
+        if ws is None:
+            ws = await open_openai_ws()
+        return ws
+    
+    async def close(self):
+        """Stop warming and close any idle sockets"""
+        if self._fill_task is not None:
+            self._fill_task.cancel()
+            self._fill_task = None
+        while self._idle:
+            _, ws = self._idle.popleft()
+            await ws.close()
+
+openai_pool = OpenAIConnectionPool(OPENAI_WARM_CONNECTIONS)
+
 class OpenAIRealtimeProxy:
     """Proxy between frontend WebSocket and OpenAI Realtime API"""
     
-    def __init__(self, gmail_functions: Dict):
+    __slots__ = (
+        "api_key", "gmail_functions", "truncate_result", "openai_ws", "client_ws", "user_id",
+        "pending_audio_response", "_response_watchdog", "_audio_chunk_count",
+        "_audio_chunks", "_audio_chunks_size", "_audio_pcm", "_audio_flush_task",
+        "_listener_task", "_function_calls", "_function_slots", "_client_queue", "_audio_dropped",
+        "_openai_routes",
+        "_speech_start_time", "_commit_time", "_first_audio_time",
+    )
+    
+    def __init__(self, gmail_functions: Dict, truncate_result: Optional[Callable[..., str]] = None):
         self.api_key = os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY not found")
         
         self.gmail_functions = gmail_functions  # Reference to existing Gmail functions
+        self.truncate_result = truncate_result  # Shared result truncation from main, if provided
         self.openai_ws: Optional[websockets.WebSocketClientProtocol] = None
         self.client_ws: Optional[Any] = None  # Frontend WebSocket
         self.user_id: Optional[str] = None
         self.pending_audio_response = False  # Track if we're waiting for audio response
+        self._response_watchdog: Optional[asyncio.TimerHandle] = None  # See _emergency_timeout_reset
+        self._audio_chunk_count = 0  # Audio deltas in the current response - reset on response.created
         
-    async def connect_to_openai(self):
-        """Connect to OpenAI Realtime API"""
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "OpenAI-Beta": "realtime=v1"
+        # Latency timestamps (time.time()) - 0.0 while not being measured
+        self._speech_start_time = 0.0
+        self._commit_time = 0.0
+        self._first_audio_time = 0.0
+        
+        # Outbound audio coalescing (see _queue_audio)
+        self._audio_chunks: List[str] = []
+        self._audio_chunks_size = 0
+        self._audio_pcm = bytearray()  # Raw PCM16 from binary frames - base64-encoded once per flush
+        self._audio_flush_task: Optional[asyncio.Task] = None
+        
+        # OpenAI listener - owned by the proxy so it outlives a dropped frontend socket
+        self._listener_task: Optional[asyncio.Task] = None
+        
+        # In-flight tool calls by call_id (see _run_function_call)
+        self._function_calls: Dict[str, asyncio.Task] = {}
+        self._function_slots = asyncio.Semaphore(FUNCTION_CALL_CONCURRENCY)
+        
+        # Outbound frontend frames (see write_to_client)
+        self._client_queue: asyncio.Queue[Union[str, bytes]] = asyncio.Queue(maxsize=CLIENT_QUEUE_MAX)
+        self._audio_dropped = 0  # Audio frames dropped since the queue last had room
+        
+        # OpenAI event type -> handler
+        handlers: Dict[str, Callable[[Dict], Awaitable[None]]] = {
+            "response.audio.delta": self._on_audio_delta,
+            "response.created": self._on_response_created,
+            "conversation.item.created": self._on_item_created,
+            "response.output_item.added": self._on_output_item_added,
+            "response.done": self._on_response_done,
+            "input_audio_buffer.speech_started": self._on_speech_started,
+            "input_audio_buffer.committed": self._on_audio_committed,
+            "conversation.item.input_audio_transcription.completed": self._on_transcription,
+            "response.function_call_arguments.done": self._on_function_call,
+            "response.function_call_arguments.delta": self._on_function_call_delta,
+            "session.updated": self._on_session_updated,
+            "error": self._on_error,
+        }
+        # OpenAI event type -> (forward to frontend, handler), so routing is one lookup
+        # (see handle_openai_message); types in neither set are ignored
+        self._openai_routes: Dict[str, Tuple[bool, Optional[Callable[[Dict], Awaitable[None]]]]] = {
+            event_type: (event_type in FORWARDED_EVENT_TYPES, handlers.get(event_type))
+            for event_type in FORWARDED_EVENT_TYPES | handlers.keys()
         }
         
+    async def connect_to_openai(self):
+        """Connect to OpenAI Realtime API"""
         try:
-            print("🔗 Connecting to OpenAI Realtime API...")
-            self.openai_ws = await websockets.connect(
-                "wss://api.openai.com/v1/realtime?model=gpt-4o-mini-realtime-preview-2024-12-17",
-                extra_headers=headers,
-                max_size=1024*1024*16,
-                ping_interval=30,  # Send ping every 30 seconds
-                ping_timeout=10,   # Wait 10 seconds for pong
-                close_timeout=10   # Wait 10 seconds for close
-            )
-            print("✅ Connected to OpenAI Realtime API (gpt-4o-mini-realtime-preview-2024-12-17)")
+            logger.info("🔗 Connecting to OpenAI Realtime API...")
+            self.openai_ws = await openai_pool.acquire()
+            logger.info("✅ Connected to OpenAI Realtime API (gpt-4o-mini-realtime-preview-2024-12-17)")
             return True
         except Exception as e:
-            print(f"❌ OpenAI connection failed: {e}")
+            logger.error("❌ OpenAI connection failed: %s", e)
             return False
     
     async def setup_session(self):
         """Configure OpenAI session with Gmail tools - optimized for audio responses"""
-        tools = self._create_gmail_tools()
-        
-        session_config = {
-            "type": "session.update",
-            "session": {
-                "modalities": ["text", "audio"],
-                "instructions": (
-                    "You are VoiceInbox, a helpful Gmail assistant. "
-                    "When users ask about their emails, call the appropriate function and then provide a natural, conversational response. "
-                    "Be concise but helpful in your audio responses."
-                ),
-                "voice": "alloy",
-                "input_audio_format": "pcm16",
-                "output_audio_format": "pcm16",
-                "input_audio_transcription": {
-                    "model": "whisper-1"
-                },
-                "turn_detection": {
-                    "type": "server_vad",
-                    "threshold": 0.5,
-                    "prefix_padding_ms": 200,
-                    "silence_duration_ms": 300
-                },
-                "tools": tools,
-                "tool_choice": "auto",
-                "temperature": 0.6,
-                "max_response_output_tokens": 800  # CORRECTED: For session.update use max_response_output_tokens
-            }
-        }
-        
         if self.openai_ws:
-            await self.openai_ws.send(json.dumps(session_config))
-            print("📤 Sent session config with Gmail tools")
-            print(f"🔧 Configured {len(tools)} Gmail functions for OpenAI")
-            print(f"🎯 Tools available: {[tool['name'] for tool in tools]}")
-            print(f"💬 Instructions: {session_config['session']['instructions'][:100]}...")
-            print(f"🎯 VAD optimized: 300ms silence detection, 200ms padding for FASTER response")
-    
-    def _create_gmail_tools(self):
-        """Convert Gmail functions to OpenAI tool format"""
-        # Expanded functions for better email management
-        return [
-            {
-                "type": "function",
-                "name": "count_unread_emails",
-                "description": "REQUIRED: Call this function whenever user asks 'how many unread emails', 'unread count', 'how many emails', or similar counting questions. Returns exact number of unread emails.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {},
-                    "additionalProperties": False
-                }
-            },
-            {
-                "type": "function",
-                "name": "list_unread",
-                "description": "List actual unread email details (subjects, senders) - use when user wants to see email content",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "max_results": {
-                            "type": "integer",
-                            "description": "Maximum number of emails to return",
-                            "default": 10
-                        }
-                    },
-                    "additionalProperties": False
-                }
-            },
-            {
-                "type": "function", 
-                "name": "search_messages",
-                "description": "Search emails using Gmail search syntax. For important emails, try multiple strategies: 'is:starred' (user-starred), 'from:boss@company.com' (from specific important people), 'subject:urgent OR subject:important' (urgent content), or 'label:important' (Gmail's auto-importance). You can also search by sender names.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "query": {
-                            "type": "string",
-                            "description": "Gmail search query. Examples: 'from:john urgent', 'is:starred', 'label:important', 'subject:invoice'"
-                        },
-                        "max_results": {
-                            "type": "integer", 
-                            "description": "Maximum number of results to return",
-                            "default": 5
-                        }
-                    },
-                    "required": ["query"],
-                    "additionalProperties": False
-                }
-            },
-            {
-                "type": "function",
-                "name": "create_draft",
-                "description": "Create or send email drafts. Use this when user asks to draft, compose, write, or send emails",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "to": {
-                            "type": "array",
-                            "items": {"type": "string"},
-                            "description": "Recipient email addresses"
-                        },
-                        "subject": {
-                            "type": "string",
-                            "description": "Email subject line"
-                        },
-                        "body_markdown": {
-                            "type": "string",
-                            "description": "Email body content (can include markdown)"
-                        },
-                        "send": {
-                            "type": "boolean",
-                            "description": "Whether to send immediately (true) or just create draft (false)",
-                            "default": False
-                        },
-                        "cc": {
-                            "type": "array",
-                            "items": {"type": "string"},
-                            "description": "CC recipients",
-                            "default": []
-                        }
-                    },
-                    "required": ["to", "subject", "body_markdown"],
-                    "additionalProperties": False
-                }
-            },
-            {
-                "type": "function",
-                "name": "mark_read",
-                "description": "Mark emails as read. Use when user says 'mark as read' or wants to clear unread status",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "msg_ids": {
-                            "type": "array",
-                            "items": {"type": "string"},
-                            "description": "List of message IDs to mark as read"
-                        }
-                    },
-                    "required": ["msg_ids"],
-                    "additionalProperties": False
-                }
-            },
-            {
-                "type": "function",
-                "name": "categorize_unread",
-                "description": "Categorize and analyze unread emails by urgency and type. Use for email organization questions",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "max_results": {
-                            "type": "integer",
-                            "description": "Maximum number of emails to analyze",
-                            "default": 20
-                        }
-                    },
-                    "additionalProperties": False
-                }
-            }
-        ]
+            await self.openai_ws.send(_SESSION_UPDATE_FRAME)
+            logger.info("📤 Sent session config with Gmail tools")
+            logger.debug("🔧 Configured %s Gmail functions for OpenAI", len(GMAIL_TOOLS))
+            logger.debug("🎯 Tools available: %s", [tool['name'] for tool in GMAIL_TOOLS])
+            logger.debug("💬 Instructions: %s...", SESSION_CONFIG['instructions'][:100])
+            logger.debug("🎯 VAD optimized: 300ms silence detection, 200ms padding for FASTER response")
     
-    async def handle_client_message(self, message_data: Dict):
-        """Handle message from frontend and route appropriately"""
+    async def handle_client_message(self, message_data: Dict, raw: Optional[str] = None):
+        """Handle message from frontend and route appropriately
+        
+        raw is the frame as received; when given, relayed messages are sent on unchanged.
+        """
         message_type = message_data.get("type")
         
-        # Forward all OpenAI Realtime API messages directly
-        if message_type in [
-            "input_audio_buffer.append",
-            "input_audio_buffer.commit", 
-            "response.create",
-            "conversation.item.create",
-            "response.cancel"
-        ]:
+        # Audio chunks are coalesced and flushed to OpenAI as one merged append frame
+        if message_type == "input_audio_buffer.append":
+            if self.openai_ws:
+                await self._queue_client_audio(message_data.get("audio", ""))
+        
+        # Forward all other OpenAI Realtime API messages directly
+        elif message_type in CLIENT_FORWARD_TYPES:
             if self.openai_ws:
-                await self.openai_ws.send(json.dumps(message_data))
+                # Control frames must stay ordered behind any audio still buffered
+                await self._flush_audio()
+                await self.openai_ws.send(raw if raw is not None else json_dumps(message_data))
                 # Only log important messages
-                if message_type in ["input_audio_buffer.commit", "response.create"]:
-                    print(f"📤 Forwarded {message_type} to OpenAI")
+                if message_type in ("input_audio_buffer.commit", "response.create"):
+                    logger.debug("📤 Forwarded %s to OpenAI", message_type)
                 
                 # For push-to-talk mode, manually create response after commit
                 if message_type == "input_audio_buffer.commit":
-                    print("📱 Audio committed - creating response for push-to-talk mode")
+                    logger.debug("📱 Audio committed - creating response for push-to-talk mode")
                     # Create response immediately since user manually stopped recording
-                    response_message = {
-                        "type": "response.create"
-                    }
-                    await self.openai_ws.send(json.dumps(response_message))
-                    print("🤖 Response created for push-to-talk interaction")
+                    await self.openai_ws.send(_RESPONSE_CREATE_FRAME)
+                    logger.debug("🤖 Response created for push-to-talk interaction")
         
         # Legacy audio message handling (for backward compatibility)
         elif message_type == "audio":
             if self.openai_ws:
-                openai_message = {
-                    "type": "input_audio_buffer.append",
-                    "audio": message_data.get("audio", "")
-                }
-                await self.openai_ws.send(json.dumps(openai_message))
-                print("🎤 Converted legacy audio message to OpenAI format")
+                await self._queue_client_audio(message_data.get("audio", ""))
+                logger.debug("🎤 Converted legacy audio message to OpenAI format")
         
         else:
-            print(f"⚠️ Unknown message type from frontend: {message_type}")
+            logger.warning("⚠️ Unknown message type from frontend: %s", message_type)
     
-    async def handle_openai_message(self, message_data: Dict):
-        """Handle message from OpenAI and route to frontend or Gmail functions"""
-        message_type = message_data.get("type")
+    async def handle_client_audio(self, pcm: bytes):
+        """Handle a binary frame from frontend - raw PCM16 audio, no JSON envelope"""
+        if not self.openai_ws:
+            return
         
-        # Only forward essential messages to frontend to prevent flooding
-        essential_messages = {
-            'session.created', 'session.updated', 'system',
-            'response.created', 'response.done', 'error',
-            'response.audio.delta', 'response.audio.done',
-            'response.output_item.added', 'conversation.item.created',
-            'input_audio_buffer.speech_started', 'input_audio_buffer.committed'
-        }
+        # Keep the two audio sources in order - never mix them in one batch
+        if self._audio_chunks:
+            await self._flush_audio()
         
-        if message_type in essential_messages and self.client_ws:
-            try:
-                await self.client_ws.send_json(message_data)
-            except Exception as e:
-                print(f"⚠️ Error forwarding message to frontend: {e}")
+        self._audio_pcm += pcm
+        if len(self._audio_pcm) >= AUDIO_FLUSH_MAX_BYTES * 3 // 4:  # Cap is in base64 characters
+            await self._flush_audio()
+        elif self._audio_flush_task is None:
+            self._audio_flush_task = asyncio.create_task(self._flush_audio_later())
+    
+    async def _queue_client_audio(self, audio: Any):
+        """Queue base64 audio received inside a JSON message, rejecting anything unsafe to splice"""
+        if not isinstance(audio, str) or not _is_base64(audio):
+            logger.warning("⚠️ Dropping malformed audio chunk from frontend")
+            return
+        await self._queue_audio(audio)
+    
+    async def _queue_audio(self, audio: str):
+        """Buffer a base64 audio chunk until the next flush"""
+        if self._audio_pcm:
+            await self._flush_audio()
+        
+        self._audio_chunks.append(audio)
+        self._audio_chunks_size += len(audio)
+        
+        # Base64 padding can only appear at the end of the merged payload, so a padded
+        # chunk closes the batch; large batches are flushed right away
+        if audio.endswith("=") or self._audio_chunks_size >= AUDIO_FLUSH_MAX_BYTES:
+            await self._flush_audio()
+        elif self._audio_flush_task is None:
+            self._audio_flush_task = asyncio.create_task(self._flush_audio_later())
+    
+    async def _flush_audio_later(self):
+        """Flush buffered audio once the coalescing window has passed"""
+        await asyncio.sleep(AUDIO_FLUSH_INTERVAL)
+        self._audio_flush_task = None
+        try:
+            await self._flush_audio()
+        except Exception as e:
+            logger.warning("⚠️ Error flushing audio to OpenAI: %s", e)
+    
+    async def _flush_audio(self):
+        """Send all buffered audio chunks as a single input_audio_buffer.append frame"""
+        if self._audio_flush_task is not None:
+            self._audio_flush_task.cancel()
+            self._audio_flush_task = None
+        
+        if self._audio_pcm:
+            # OpenAI only accepts base64 inside JSON - encoding the whole batch at once means
+            # padding can only land at the end, however the frames were sized
+            self._audio_chunks.append(base64.b64encode(self._audio_pcm).decode("ascii"))
+            self._audio_pcm.clear()
+        
+        if not self._audio_chunks:
+            return
+        
+        frame = "".join([_AUDIO_APPEND_HEAD, *self._audio_chunks, _AUDIO_APPEND_TAIL])
+        self._audio_chunks.clear()
+        self._audio_chunks_size = 0
+        
+        if self.openai_ws:
+            await self.openai_ws.send(frame)
+    
+    async def handle_openai_message(self, message_data: Dict, raw: Optional[str] = None):
+        """Handle message from OpenAI and route to frontend or Gmail functions
+        
+        raw is the frame as received; when given it is forwarded verbatim instead of re-serialized.
+        """
+        route = self._openai_routes.get(message_data.get("type"))
+        if route is None:
+            return
+        forward, handler = route
+        
+        # Only forward essential messages to frontend to prevent flooding
+        if forward and self.client_ws:
+            await self._send_to_client(raw if raw is not None else json_dumps(message_data))
         
         # Handle specific message types for processing (minimal logging)
-        if message_type == "response.audio.delta":
-            # Monitor audio stream health occasionally
-            if hasattr(self, '_audio_chunk_count'):
-                self._audio_chunk_count += 1
-            else:
-                self._audio_chunk_count = 1
-                print("🎵 Audio streaming started")
-            
-            # Log every 20th chunk to monitor stream health without spam
-            if self._audio_chunk_count % 20 == 0:
-                print(f"🎵 Audio chunk #{self._audio_chunk_count} - stream healthy")
+        if handler is not None:
+            await handler(message_data)
+    
+    async def _on_audio_delta(self, message_data: Dict):
+        self._track_audio_delta()
+    
+    async def _on_response_created(self, message_data: Dict):
+        # Reset audio chunk counter for new response
+        self._audio_chunk_count = 0
         
-        elif message_type == "response.created":
-            # Reset audio chunk counter for new response
-            self._audio_chunk_count = 0
-            
-            # Measure time from commit to response creation
-            if hasattr(self, '_commit_time'):
-                response_creation_time = time.time()
-                creation_latency = (response_creation_time - self._commit_time) * 1000
-                print(f"⚡ COMMIT TO RESPONSE: {creation_latency:.0f}ms (faster = better)")
-            pass  # Logging handled in _listen_to_openai
-        
-        elif message_type == "conversation.item.created":
-            print(f"📝 Conversation item created: {message_data.get('item', {}).get('type', 'unknown')}")
-            
-        elif message_type == "response.output_item.added":
+        # Measure time from commit to response creation
+        if self._commit_time:
+            response_creation_time = time.time()
+            creation_latency = (response_creation_time - self._commit_time) * 1000
+            logger.info("⚡ COMMIT TO RESPONSE: %.0fms (faster = better)", creation_latency)
+    
+    async def _on_item_created(self, message_data: Dict):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📝 Conversation item created: %s", message_data.get('item', {}).get('type', 'unknown'))
+    
+    async def _on_output_item_added(self, message_data: Dict):
+        # Debug-only - skip digging through the item unless it will be logged
+        if logger.isEnabledFor(logging.DEBUG):
             item = message_data.get('item', {})
-            print(f"📝 Response output item added: {item.get('type', 'unknown')}")
+            logger.debug("📝 Response output item added: %s", item.get('type', 'unknown'))
             if item.get('type') == 'message':
                 content = item.get('content', [])
-                print(f"📝 Message item added with {len(content)} content items")
+                logger.debug("📝 Message item added with %s content items", len(content))
                 for i, content_item in enumerate(content):
-                    print(f"    Content {i}: {content_item.get('type', 'unknown')}")
+                    logger.debug("    Content %s: %s", i, content_item.get('type', 'unknown'))
+    
+    async def _on_response_done(self, message_data: Dict):
+        # Log the full response to debug why no audio is being returned
+        if logger.isEnabledFor(logging.DEBUG):
+            self._log_response_structure(message_data.get('response') or {})
         
-        elif message_type == "response.done":
-            # Log the full response to debug why no audio is being returned
-            response = message_data.get('response', {})
-            output_items = response.get('output', [])
-            
-            print(f"🎙️ Response done. Output items: {len(output_items)}")
-            for i, item in enumerate(output_items):
-                item_type = item.get('type', 'unknown')
-                print(f"  Item {i}: type={item_type}")
-                if item_type == 'message':
-                    role = item.get('role', 'unknown')
-                    content = item.get('content', [])
-                    print(f"    Role: {role}, Content items: {len(content)}")
-                    for j, content_item in enumerate(content):
-                        content_type = content_item.get('type', 'unknown')
-                        print(f"      Content {j}: type={content_type}")
-                        if content_type == 'audio':
-                            print(f"        Audio found!")
-                        elif content_type == 'text':
-                            text_content = content_item.get('text', '')[:50]
-                            print(f"        Text: {text_content}...")
-            
-            # Reset pending audio response flag when any response completes
-            if hasattr(self, 'pending_audio_response'):
-                self.pending_audio_response = False
-            
-            # Reset timing variables for next interaction
-            if hasattr(self, '_speech_start_time'):
-                delattr(self, '_speech_start_time')
-            if hasattr(self, '_first_audio_time'):
-                delattr(self, '_first_audio_time')
-            
-            if not any(item.get('type') == 'message' for item in output_items):
-                print("⚠️ No message items found in response!")
-            
-            pass  # Logging handled in _listen_to_openai
-        
-        elif message_type == "input_audio_buffer.speech_started":
-            print("🎤 User started speaking")
-            # Start timing for latency measurement
-            if not hasattr(self, '_speech_start_time'):
-                self._speech_start_time = time.time()
-        
-        elif message_type == "input_audio_buffer.committed":
-            if hasattr(self, '_speech_start_time'):
-                commit_time = time.time()
-                speech_duration = (commit_time - self._speech_start_time) * 1000
-                print(f"⏱️ User spoke for {speech_duration:.0f}ms before VAD cutoff")
-                # Start timing for response latency
-                self._commit_time = commit_time
-        
-        elif message_type == "response.audio.delta":
-            # First audio chunk - measure total latency
-            if hasattr(self, '_speech_start_time') and not hasattr(self, '_first_audio_time'):
-                self._first_audio_time = time.time()
-                total_latency = (self._first_audio_time - self._speech_start_time) * 1000
-                print(f"⚡ TOTAL LATENCY: {total_latency:.0f}ms (target: <200ms - improved from 500ms VAD)")
-                if total_latency > 200:
-                    print(f"⚠️ Latency above new target! {total_latency:.0f}ms > 200ms")
-                else:
-                    print(f"✅ Excellent latency! {total_latency:.0f}ms < 200ms")
+        # Reset pending audio response flag when any response completes
+        self.pending_audio_response = False
+        if self._response_watchdog is not None:
+            self._response_watchdog.cancel()
+            self._response_watchdog = None
         
-        elif message_type == "conversation.item.input_audio_transcription.completed":
-            transcription = message_data.get('transcript', '')
-            print(f"🎤 User said: '{transcription}'")
-            
-        elif message_type == "response.function_call_arguments.done":
-            # Function call completed - execute it
-            start_time = time.time()  # Performance timing
-            
-            item_id = message_data.get("item_id")
-            call_id = message_data.get("call_id")
-            function_name = message_data.get("name")
-            function_args = message_data.get("arguments")
-            
-            print(f"🔧 Function call detected: {function_name} with args: {function_args}")
-            
-            if function_name and function_args is not None:
-                print(f"🔧 Executing Gmail function: {function_name}")
-                await self._execute_function(call_id or item_id, function_name, function_args)
-                
-                # Performance logging
-                execution_time = (time.time() - start_time) * 1000  # Convert to ms
-                print(f"⚡ Function {function_name} completed in {execution_time:.0f}ms")
-        
-        elif message_type.startswith("response.function_call"):
-            print(f"🔧 Function call event: {message_type}")
-            print(f"🔍 Full message data: {json.dumps(message_data, indent=2)}")
-            if message_type == "response.function_call_arguments.delta":
-                function_name = message_data.get('name', 'unknown')
-                args_delta = message_data.get('delta', '')
-                print(f"🔧 Function call in progress: {function_name}, args: {args_delta}")
-        
-        elif message_type in ["session.created", "session.updated"]:
-            # Send confirmation to frontend that session is ready
-            if self.client_ws and message_type == "session.updated":
-                print("✅ OpenAI session ready")
-                try:
-                    await self.client_ws.send_json({
-                        "type": "system",
-                        "message": "OpenAI session ready - voice commands enabled"
-                    })
-                except Exception as e:
-                    print(f"⚠️ Error sending session ready message: {e}")
+        # Reset timing variables for next interaction
+        self._speech_start_time = 0.0
+        self._first_audio_time = 0.0
+    
+    def _log_response_structure(self, response: Dict):
+        """Debug dump of a completed response's output items"""
+        output_items = response.get('output', [])
+        
+        logger.debug("🎙️ Response done. Output items: %s", len(output_items))
+        for i, item in enumerate(output_items):
+            item_type = item.get('type', 'unknown')
+            logger.debug("  Item %s: type=%s", i, item_type)
+            if item_type == 'message':
+                role = item.get('role', 'unknown')
+                content = item.get('content', [])
+                logger.debug("    Role: %s, Content items: %s", role, len(content))
+                for j, content_item in enumerate(content):
+                    content_type = content_item.get('type', 'unknown')
+                    logger.debug("      Content %s: type=%s", j, content_type)
+                    if content_type == 'audio':
+                        logger.debug("        Audio found!")
+                    elif content_type == 'text':
+                        text_content = content_item.get('text', '')[:50]
+                        logger.debug("        Text: %s...", text_content)
         
-        elif message_type == "error":
-            print(f"❌ OpenAI error: {message_data.get('error', {})}")
+        if not any(item.get('type') == 'message' for item in output_items):
+            logger.debug("⚠️ No message items found in response!")
+    
+    async def _on_speech_started(self, message_data: Dict):
+        logger.info("🎤 User started speaking")
+        # Start timing for latency measurement
+        if not self._speech_start_time:
+            self._speech_start_time = time.time()
+    
+    async def _on_audio_committed(self, message_data: Dict):
+        if self._speech_start_time:
+            commit_time = time.time()
+            speech_duration = (commit_time - self._speech_start_time) * 1000
+            logger.info("⏱️ User spoke for %.0fms before VAD cutoff", speech_duration)
+            # Start timing for response latency
+            self._commit_time = commit_time
+    
+    async def _on_transcription(self, message_data: Dict):
+        transcription = message_data.get('transcript', '')
+        logger.info("🎤 User said: '%s'", transcription)
+    
+    async def _on_function_call(self, message_data: Dict):
+        # Function call completed - execute it
+        start_time = time.time()  # Performance timing
+        
+        item_id = message_data.get("item_id")
+        call_id = message_data.get("call_id")
+        function_name = message_data.get("name")
+        function_args = message_data.get("arguments")
+        
+        logger.info("🔧 Function call detected: %s with args: %s", function_name, function_args)
+        
+        if function_name and function_args is not None:
+            logger.debug("🔧 Executing Gmail function: %s", function_name)
+            call_id = call_id or item_id
+            task = asyncio.create_task(self._run_function_call(call_id, function_name, function_args, start_time))
+            self._function_calls[call_id] = task
+            task.add_done_callback(lambda _, call_id=call_id: self._function_calls.pop(call_id, None))
+    
+    async def _on_function_call_delta(self, message_data: Dict):
+        logger.debug("🔧 Function call event: %s", message_data.get("type"))
+        logger.debug("🔍 Full message data: %s", message_data)
+        function_name = message_data.get('name', 'unknown')
+        args_delta = message_data.get('delta', '')
+        logger.debug("🔧 Function call in progress: %s, args: %s", function_name, args_delta)
+    
+    async def _on_session_updated(self, message_data: Dict):
+        # Send confirmation to frontend that session is ready
+        if self.client_ws:
+            logger.info("✅ OpenAI session ready")
+            await self.notify_session_ready()
+    
+    async def _on_error(self, message_data: Dict):
+        logger.error("❌ OpenAI error: %s", message_data.get('error', {}))
+    
+    async def _run_function_call(self, call_id: str, function_name: str, arguments: str, start_time: float):
+        """Execute a tool call off the listener, bounded to FUNCTION_CALL_CONCURRENCY at a time"""
+        async with self._function_slots:
+            await self._execute_function(call_id, function_name, arguments)
+        
+        # Performance logging
+        execution_time = (time.time() - start_time) * 1000  # Convert to ms
+        logger.info("⚡ Function %s completed in %.0fms", function_name, execution_time)
     
     async def _execute_function(self, call_id: str, function_name: str, arguments: str):
         """Execute a Gmail function and send result back to OpenAI"""
         try:
-            args = json.loads(arguments) if arguments else {}
-            
             # Execute the function with user_id as first parameter
-            if function_name in self.gmail_functions:
-                func = self.gmail_functions[function_name]
+            func = self.gmail_functions.get(function_name)
+            if func is not None:
+                parse_args = FUNCTION_ARG_PARSERS.get(function_name, _dict_args)
+                result = await func(self.user_id, *parse_args(arguments))
                 
-                # All Gmail functions expect user_id as first parameter
-                # Functions with simple parameters (like max_results)
-                if function_name in ['list_unread', 'list_unread_priority']:
-                    max_results = args.get('max_results', 20)
-                    result = await func(self.user_id, max_results)
-                
-                # Functions with no additional parameters
-                elif function_name in ['abort_current_action', 'narrow_scope_request', 'count_unread_emails', 'get_email_counts']:
-                    result = await func(self.user_id)
-                
-                # Functions with simple parameters (like max_results)
-                elif function_name in ['categorize_unread']:
-                    try:
-                        import importlib
-                        main_module = importlib.import_module('main')
-                        CategorizeUnreadArgs = getattr(main_module, 'CategorizeUnreadArgs')
-                        max_results = args.get('max_results', 20)
-                        result = await func(self.user_id, CategorizeUnreadArgs(max_results=max_results))
-                    except (ImportError, AttributeError) as e:
-                        print(f"Warning: Could not import CategorizeUnreadArgs: {e}")
-                        # Fallback: call with max_results directly
-                        max_results = args.get('max_results', 20)
-                        result = await func(self.user_id, max_results)
-                
-                # Functions with complex args that need the full args dict
-                else:
-                    # Import here to avoid circular imports - use dynamic import
-                    try:
-                        import importlib
-                        main_module = importlib.import_module('main')
-                        SearchMessagesArgs = getattr(main_module, 'SearchMessagesArgs')
-                        GetThreadArgs = getattr(main_module, 'GetThreadArgs')
-                        SummarizeMessagesArgs = getattr(main_module, 'SummarizeMessagesArgs')
-                        SummarizeThreadArgs = getattr(main_module, 'SummarizeThreadArgs')
-                        CategorizeUnreadArgs = getattr(main_module, 'CategorizeUnreadArgs')
-                        CreateDraftArgs = getattr(main_module, 'CreateDraftArgs')
-                        SendDraftArgs = getattr(main_module, 'SendDraftArgs')
-                        ScheduleSendArgs = getattr(main_module, 'ScheduleSendArgs')
-                        ModifyLabelsArgs = getattr(main_module, 'ModifyLabelsArgs')
-                        BulkDeleteArgs = getattr(main_module, 'BulkDeleteArgs')
-                        MarkReadArgs = getattr(main_module, 'MarkReadArgs')
-                        CreateCalendarEventArgs = getattr(main_module, 'CreateCalendarEventArgs')
-                    except ImportError as e:
-                        print(f"Warning: Could not import from main module: {e}")
-                        raise
-                    
-                    # Map function names to their argument classes
-                    arg_classes = {
-                        'search_messages': SearchMessagesArgs,
-                        'get_thread': GetThreadArgs,
-                        'summarize_messages': SummarizeMessagesArgs,
-                        'summarize_thread': SummarizeThreadArgs,
-                        'categorize_unread': CategorizeUnreadArgs,
-                        'create_draft': CreateDraftArgs,
-                        'send_draft': SendDraftArgs,
-                        'schedule_send': ScheduleSendArgs,
-                        'modify_labels': ModifyLabelsArgs,
-                        'bulk_delete': BulkDeleteArgs,
-                        'mark_read': MarkReadArgs,
-                        'create_calendar_event': CreateCalendarEventArgs
-                    }
-                    
-                    if function_name in arg_classes:
-                        args_obj = arg_classes[function_name](**args)
-                        result = await func(self.user_id, args_obj)
+                # Issue 6 Fix: Use consistent truncation function - serialize once and only
+                # hand the result to the truncation helper when it is over the 4KB audio limit
+                result_str = json_dumps(result)
+                original_size = len(result_str)
+                if original_size > 4000:
+                    if self.truncate_result is not None:
+                        result_str = self.truncate_result(result, 4000, result_str)
                     else:
-                        # Fallback - just pass args as is
-                        result = await func(self.user_id, args)
-                
-                # Issue 6 Fix: Use consistent truncation function
-                try:
-                    import importlib
-                    main_module = importlib.import_module('main')
-                    truncate_large_result = getattr(main_module, 'truncate_large_result')
-                    result_str = truncate_large_result(result, 4000)  # 4KB limit for audio responses
-                    
-                    original_size = len(json.dumps(result, default=str))
-                    if len(result_str) < original_size:
-                        print(f"⚠️ Truncated large result for {function_name}: {original_size} -> {len(result_str)} chars")
-                except (ImportError, AttributeError):
-                    # Fallback to original logic if import fails
-                    result_str = json.dumps(result, default=str)
-                    if len(result_str) > 4000:
                         result_str = result_str[:4000] + '... (truncated)'
-                        print(f"⚠️ Fallback truncation for {function_name}")
+                    logger.warning("⚠️ Truncated large result for %s: %s -> %s chars", function_name, original_size, len(result_str))
                 
                 # Send result back to OpenAI
                 function_result = {
@@ -517,38 +754,34 @@ class OpenAIRealtimeProxy:
                 }
                 
                 if self.openai_ws:
-                    await self.openai_ws.send(json.dumps(function_result))
-                    print(f"📤 Sent function result to OpenAI: {json.dumps(result, default=str)[:100]}...")
+                    await self.openai_ws.send(json_dumps(function_result))
+                    logger.debug("📤 Sent function result to OpenAI: %s...", result_str[:100])
                     
                     # CRITICAL: OpenAI Realtime API requires explicit response creation after function calls
                     # This is different from regular chat API - function calls don't automatically continue
                     if not self.pending_audio_response:
                         self.pending_audio_response = True
                         
-                        # CRITICAL FIX: Use session defaults to avoid conflicts
-                        audio_response = {
-                            "type": "response.create"
-                            # Let it inherit session settings:
-                            # - temperature: 0.6 (meets minimum requirement)
-                            # - modalities: ["text", "audio"]
-                            # - max_response_output_tokens: 800
-                        }
-                        await self.openai_ws.send(json.dumps(audio_response))
-                        print(f"🎤 Response created with session defaults (no conflicts)")
+                        # CRITICAL FIX: Use session defaults to avoid conflicts - the bare
+                        # response.create inherits temperature, modalities and token limit
+                        await self.openai_ws.send(_RESPONSE_CREATE_FRAME)
+                        logger.debug("🎤 Response created with session defaults (no conflicts)")
                         
                         # EMERGENCY TIMEOUT: Reset if no response within 10 seconds
-                        asyncio.create_task(self._emergency_timeout_reset(10.0))
+                        if self._response_watchdog is not None:
+                            self._response_watchdog.cancel()
+                        self._response_watchdog = asyncio.get_running_loop().call_later(
+                            10.0, self._emergency_timeout_reset, 10.0
+                        )
                     else:
-                        print(f"⏳ Audio response already pending, skipping duplicate")
+                        logger.info("⏳ Audio response already pending, skipping duplicate")
                 
-                print(f"✅ Function {function_name} completed - OpenAI generating LIGHTNING-FAST response")
+                logger.info("✅ Function %s completed - OpenAI generating LIGHTNING-FAST response", function_name)
             else:
-                print(f"⚠️ Unknown function: {function_name}")
+                logger.warning("⚠️ Unknown function: %s", function_name)
                 
         except Exception as e:
-            print(f"❌ Error executing function {function_name}: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error executing function %s: %s", function_name, e)
             
             # CRITICAL FIX: Always reset pending response on errors
             self.pending_audio_response = False
@@ -560,97 +793,243 @@ class OpenAIRealtimeProxy:
                     "item": {
                         "type": "function_call_output",
                         "call_id": call_id,
-                        "output": json.dumps({"error": str(e)})
+                        "output": json_dumps({"error": str(e)})
                     }
                 }
-                await self.openai_ws.send(json.dumps(error_result))
+                await self.openai_ws.send(json_dumps(error_result))
     
     async def start_proxy(self, client_websocket, user_id: str):
-        """Start proxying between client and OpenAI"""
+        """Start proxying between client and OpenAI.
+        
+        Connects and configures the OpenAI session and starts the OpenAI listener; the caller
+        runs write_to_client() and wait_listener() alongside its client receive loop.
+        """
         self.client_ws = client_websocket
         self.user_id = user_id
         
         # Connect to OpenAI
         if not await self.connect_to_openai():
-            print("❌ Failed to connect to OpenAI")
+            logger.error("❌ Failed to connect to OpenAI")
             return False
         
         # Setup session and wait for confirmation
         await self.setup_session()
         
-        # Start listening to OpenAI messages immediately
-        asyncio.create_task(self._listen_to_openai())
+        self._listener_task = asyncio.create_task(self.listen_to_openai())
         
-        print(f"🎉 OpenAI Realtime proxy started successfully for user {user_id}")
+        logger.info("🎉 OpenAI Realtime proxy started successfully for user %s", user_id)
         return True
     
-    async def _listen_to_openai(self):
+    def detach(self):
+        """Stop queuing frontend frames while the session is held with no client attached"""
+        self.client_ws = None
+    
+    def rebind(self, client_websocket):
+        """Attach a reconnected frontend socket to this (still open) OpenAI session"""
+        # Frames queued for the dropped socket are stale - the new client starts clean
+        while not self._client_queue.empty():
+            self._client_queue.get_nowait()
+        self._audio_dropped = 0
+        self.client_ws = client_websocket
+    
+    @property
+    def is_connected(self) -> bool:
+        """Whether the OpenAI session is still being listened to"""
+        return self._listener_task is not None and not self._listener_task.done()
+    
+    async def wait_listener(self):
+        """Wait for the OpenAI listener to finish, without cancelling it if the waiter is cancelled.
+        
+        listen_to_openai returns normally once it gives up, so that exit is raised as
+        OpenAIListenerClosedError - a normal return would leave the rest of a task group running.
+        """
+        await asyncio.shield(self._listener_task)
+        raise OpenAIListenerClosedError("OpenAI listener exited")
+    
+    def _track_audio_delta(self):
+        """Monitor audio stream health occasionally"""
+        self._audio_chunk_count += 1
+        
+        # First audio chunk of a measured turn - log total latency
+        if self._audio_chunk_count == 1 and self._speech_start_time and not self._first_audio_time:
+            self._first_audio_time = time.time()
+            total_latency = (self._first_audio_time - self._speech_start_time) * 1000
+            logger.info("⚡ TOTAL LATENCY: %.0fms (target: <200ms - improved from 500ms VAD)", total_latency)
+            if total_latency > 200:
+                logger.warning("⚠️ Latency above new target! %.0fms > 200ms", total_latency)
+            else:
+                logger.info("✅ Excellent latency! %.0fms < 200ms", total_latency)
+        
+        # Log every 32nd chunk to monitor stream health without spam
+        if not self._audio_chunk_count & 31:
+            logger.debug("🎵 Audio chunk #%s - stream healthy", self._audio_chunk_count)
+    
+    async def _forward_audio_delta(self, raw: str):
+        """Forward an audio delta to the frontend as a binary frame of raw PCM16 - no JSON round-trip"""
+        if self.client_ws:
+            frame: Union[str, bytes] = raw
+            match = _AUDIO_DELTA_RE.search(raw)
+            if match:
+                try:
+                    frame = base64.b64decode(match.group(1))
+                except binascii.Error:
+                    pass  # Forward the JSON frame untouched - the frontend handles both
+            await self._send_to_client(frame)
+        self._track_audio_delta()
+    
+    async def notify_session_ready(self):
+        """Tell the frontend the OpenAI session can take voice input"""
+        await self._send_to_client(_SESSION_READY_FRAME)
+    
+    async def _send_to_client(self, frame: Union[str, bytes]):
+        """Queue a frame for the frontend writer task - str for JSON events, bytes for PCM16 audio.
+        
+        A stalled browser must not stall the OpenAI listener behind audio it will never play in
+        time, so audio is dropped when the queue is full; JSON events wait for room.
+        """
+        if isinstance(frame, bytes):
+            try:
+                self._client_queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                self._audio_dropped += 1
+                if self._audio_dropped == 1:
+                    logger.warning("⚠️ Frontend not keeping up - dropping audio")
+                return
+            if self._audio_dropped:
+                logger.warning("⚠️ Dropped %s audio frames for a slow frontend", self._audio_dropped)
+                self._audio_dropped = 0
+            return
+        await self._client_queue.put(frame)
+    
+    async def write_to_client(self):
+        """Write queued frames to the frontend until cancelled.
+        
+        Frames are taken off the queue in batches so the OpenAI listener never waits on the
+        browser socket; runs of PCM audio in a batch go out as a single binary frame.
+        """
+        while True:
+            batch = [await self._client_queue.get()]
+            while len(batch) < CLIENT_WRITE_BATCH and not self._client_queue.empty():
+                batch.append(self._client_queue.get_nowait())
+            
+            frames: List[Union[str, bytes]] = []
+            for frame in batch:
+                if isinstance(frame, bytes) and frames and isinstance(frames[-1], bytes):
+                    frames[-1] += frame
+                else:
+                    frames.append(frame)
+            
+            # Sequential on purpose - concurrent sends on one socket could reorder frames
+            for frame in frames:
+                try:
+                    if isinstance(frame, bytes):
+                        await self.client_ws.send_bytes(frame)
+                    else:
+                        await self.client_ws.send_text(frame)
+                except Exception as e:
+                    logger.warning("⚠️ Error forwarding message to frontend: %s", e)
+    
+    async def listen_to_openai(self):
         """Listen for messages from OpenAI with automatic reconnection"""
         retry_count = 0
         max_retries = 3
         
         while retry_count < max_retries:
             try:
-                while self.openai_ws:
-                    message = await self.openai_ws.recv()
-                    message_data = json.loads(message)
+                # Bound once per connection - the loop runs for every OpenAI event
+                recv = self.openai_ws.recv if self.openai_ws else None
+                forward_audio_delta = self._forward_audio_delta
+                send_to_client = self._send_to_client
+                while recv is not None:
+                    message = await recv()
+                    
+                    match = _EVENT_TYPE_RE.match(message)
+                    if match:
+                        event_type = match.group(1)
+                        # Audio deltas are the bulk of the traffic and need no inspection - forward
+                        # their PCM payload without parsing the frame
+                        if event_type == "response.audio.delta":
+                            await forward_audio_delta(message)
+                            continue
+                        if not logger.isEnabledFor(logging.DEBUG):
+                            # Forward-only events go out as received, without a parse
+                            if event_type in PASSTHROUGH_EVENT_TYPES:
+                                if self.client_ws:
+                                    await send_to_client(message)
+                                continue
+                            # Nothing forwards or reacts to this event (only debug logging does)
+                            if event_type not in HANDLED_EVENT_TYPES:
+                                continue
+                    
+                    message_data = orjson.loads(message)
                     
                     # Only log essential message types to reduce noise
                     message_type = message_data.get('type', 'unknown')
                     if message_type == 'error':
-                        print(f"❌ OpenAI error: {message_type}")
+                        logger.error("❌ OpenAI error: %s", message_type)
                     elif message_type == 'response.created':
                         # Check if it's a function call response
-                        response = message_data.get('response', {})
-                        if response.get('output', []):
-                            print("🎤 Creating voice response...")
+                        response = message_data.get('response')
+                        if response and response.get('output'):
+                            logger.info("🎤 Creating voice response...")
                     elif message_type == 'response.done':
                         # Only log if it's the final voice response
-                        response = message_data.get('response', {})
-                        if any(item.get('type') == 'message' for item in response.get('output', [])):
-                            print("✅ Voice response completed")
+                        response = message_data.get('response')
+                        if response and any(item.get('type') == 'message' for item in response.get('output') or ()):
+                            logger.info("✅ Voice response completed")
                     
-                    await self.handle_openai_message(message_data)
+                    await self.handle_openai_message(message_data, message)
                     
             except websockets.exceptions.ConnectionClosed as e:
-                print(f"🔌 OpenAI WebSocket closed: {e}")
+                logger.warning("🔌 OpenAI WebSocket closed: %s", e)
                 retry_count += 1
                 if retry_count < max_retries:
-                    print(f"🔄 Attempting to reconnect to OpenAI ({retry_count}/{max_retries})...")
+                    logger.info("🔄 Attempting to reconnect to OpenAI (%s/%s)...", retry_count, max_retries)
                     if await self.connect_to_openai():
                         await self.setup_session()
-                        print("✅ OpenAI connection recovered")
+                        logger.info("✅ OpenAI connection recovered")
                         retry_count = 0  # Reset on successful reconnection
                     else:
-                        await asyncio.sleep(2 ** retry_count)  # Exponential backoff
+                        await asyncio.sleep(_reconnect_delay(retry_count))
                 else:
-                    print("❌ Failed to reconnect to OpenAI after multiple attempts")
+                    logger.error("❌ Failed to reconnect to OpenAI after multiple attempts")
                     break
                     
             except Exception as e:
-                print(f"❌ Error listening to OpenAI: {e}")
+                logger.error("❌ Error listening to OpenAI: %s", e)
                 break
     
-    async def _emergency_timeout_reset(self, timeout_seconds: float):
-        """Emergency timeout to prevent stuck responses"""
-        await asyncio.sleep(timeout_seconds)
+    def _emergency_timeout_reset(self, timeout_seconds: float):
+        """Emergency timeout to prevent stuck responses - a loop timer callback, not a task"""
+        self._response_watchdog = None
         if self.pending_audio_response:
-            print(f"❗ EMERGENCY TIMEOUT: Resetting stuck response after {timeout_seconds}s")
+            logger.warning("❗ EMERGENCY TIMEOUT: Resetting stuck response after %ss", timeout_seconds)
             self.pending_audio_response = False
             
             # Send emergency message to frontend
             if self.client_ws:
                 try:
-                    await self.client_ws.send_json({
-                        "type": "error",
-                        "error": {"message": "Response timeout - please try again"},
-                        "emergency_reset": True
-                    })
-                except Exception as e:
-                    print(f"⚠️ Error sending emergency reset: {e}")
+                    self._client_queue.put_nowait(_EMERGENCY_RESET_FRAME)
+                except asyncio.QueueFull:
+                    logger.warning("⚠️ Frontend queue full - emergency reset notice dropped")
 
     async def cleanup(self):
         """Clean up connections"""
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            self._listener_task = None
+        
+        if self._audio_flush_task is not None:
+            self._audio_flush_task.cancel()
+            self._audio_flush_task = None
+        
+        for task in list(self._function_calls.values()):
+            task.cancel()
+        
+        if self._response_watchdog is not None:
+            self._response_watchdog.cancel()
+            self._response_watchdog = None
+        
         if self.openai_ws:
             await self.openai_ws.close()
-            print("🧹 Cleaned up OpenAI connection")
+            logger.info("🧹 Cleaned up OpenAI connection")
@@ -0,0 +1,98 @@
+"""Argument models for the Gmail and Calendar helper functions.
+
+Kept free of FastAPI and Google client imports so both ``main`` and the realtime
+proxy can load them at import time.
+"""
+import time
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, validator
+
+MAX_MESSAGES = 50
+MAX_RECIPIENTS = 10
+MAX_LABELS_OP = 100
+
+class SearchMessagesArgs(BaseModel):
+    query: str
+    max_results: int = Field(default=20, le=MAX_MESSAGES)
+    include_body: bool = False
+
+class GetThreadArgs(BaseModel):
+    thread_id: str
+    include_body: bool = True
+
+class SummarizeMessagesArgs(BaseModel):
+    message_ids: List[str] = Field(max_items=MAX_MESSAGES)
+
+class SummarizeThreadArgs(BaseModel):
+    thread_id: str
+
+class CategorizeUnreadArgs(BaseModel):
+    max_results: int = Field(default=30, le=MAX_MESSAGES)
+
+class CreateDraftArgs(BaseModel):
+    to: List[str] = Field(max_items=MAX_RECIPIENTS)
+    cc: List[str] = Field(default=[], max_items=MAX_RECIPIENTS)
+    bcc: List[str] = Field(default=[], max_items=MAX_RECIPIENTS)
+    subject: str
+    body_markdown: str
+    reply_to_thread_id: Optional[str] = None
+    send: bool = False
+    
+    @validator('to', 'cc', 'bcc')
+    def validate_emails(cls, v):
+        for email in v:
+            if '@' not in email:
+                raise ValueError(f"Invalid email: {email}")
+        return v
+
+class SendDraftArgs(BaseModel):
+    draft_id: str
+
+class ScheduleSendArgs(BaseModel):
+    draft_id: str
+    send_at_epoch_ms: int
+    
+    @validator('send_at_epoch_ms')
+    def validate_future_time(cls, v):
+        if v < int(time.time() * 1000):
+            raise ValueError("INVALID_TIME: Schedule time must be in the future")
+        return v
+
+class ModifyLabelsArgs(BaseModel):
+    msg_ids: List[str] = Field(max_items=MAX_LABELS_OP)
+    add: List[str] = Field(default=[])
+    remove: List[str] = Field(default=[])
+
+class BulkDeleteArgs(BaseModel):
+    msg_ids: List[str] = Field(max_items=100)
+
+class MarkReadArgs(BaseModel):
+    msg_ids: List[str] = Field(max_items=MAX_LABELS_OP)
+
+class CreateCalendarEventArgs(BaseModel):
+    title: str
+    start_epoch_ms: int
+    end_epoch_ms: int
+    attendees: List[str] = Field(default=[])
+
+# Function name -> argument model, for functions that take validated arguments
+ARG_MODELS = {
+    "search_messages": SearchMessagesArgs,
+    "get_thread": GetThreadArgs,
+    "summarize_messages": SummarizeMessagesArgs,
+    "summarize_thread": SummarizeThreadArgs,
+    "categorize_unread": CategorizeUnreadArgs,
+    "create_draft": CreateDraftArgs,
+    "send_draft": SendDraftArgs,
+    "schedule_send": ScheduleSendArgs,
+    "modify_labels": ModifyLabelsArgs,
+    "bulk_delete": BulkDeleteArgs,
+    "mark_read": MarkReadArgs,
+    "create_calendar_event": CreateCalendarEventArgs,
+}
+
+# Compiled pydantic-core validators that parse and validate a raw JSON arguments string in one step
+ARG_JSON_VALIDATORS = {
+    name: model.__pydantic_validator__.validate_json for name, model in ARG_MODELS.items()
+}
@@ -310,6 +310,7 @@ function App() {
       // Smart URL detection for WebSocket
       const wsBaseUrl = getWsBaseUrl()
       const ws = new WebSocket(`${wsBaseUrl}/ws/${sessionToken}`)
+      ws.binaryType = 'arraybuffer'
       wsRef.current = ws
 
       ws.onopen = () => {
@@ -327,120 +328,134 @@ function App() {
         console.log(isRetry ? 'Reconnected to Gmail service' : 'Connected to Gmail service')
       }
 
-      ws.onmessage = (event) => {
-        try {
-          const message = JSON.parse(event.data)
-          const messageType = message.type
+      // Play a chunk of response audio - raw PCM16 from binary frames, or base64 from JSON events
+      const handleAudioDelta = (audio: string | ArrayBuffer) => {
+        if (awaitingAudioRef.current) {
+          awaitingAudioRef.current = false
+          if (responseTimeoutRef.current) {
+            clearTimeout(responseTimeoutRef.current)
+            responseTimeoutRef.current = null
+          }
+
+          // Measure total latency from request to first audio
+          if (requestStartTimeRef.current > 0) {
+            const totalLatency = performance.now() - requestStartTimeRef.current
+            console.log(`⚡ TOTAL RESPONSE LATENCY: ${Math.round(totalLatency)} ms (target < 250 ms)`)
+            if (totalLatency > 250) {
+              console.warn(`⚠️ Latency above target! ${Math.round(totalLatency)} ms`)
+            } else {
+              console.log(`✅ Excellent latency! ${Math.round(totalLatency)} ms`)
+            }
+            requestStartTimeRef.current = 0 // Reset timer
+          }
+        }
+        audioPlaybackHook.addAudioChunk(audio)
+      }
+
+      // Handle one server event (JSON text frames)
+      const handleServerMessage = (message: any) => {
+        const messageType = message.type
+
+        if (import.meta.env.DEV && ['response.created', 'response.done', 'response.audio.done', 'system', 'error'].includes(messageType)) {
+          console.log('WebSocket message:', message)
+        }
 
-          if (import.meta.env.DEV && ['response.created', 'response.done', 'response.audio.done', 'system', 'error'].includes(messageType)) {
-            console.log('WebSocket message:', message)
+        // Mark session as ready when we get the confirmation
+        if (messageType === 'system' && message.message?.includes('OpenAI session ready')) {
+          sessionReadyRef.current = true
+          console.log('✅ OpenAI session is ready')
+          return
+        }
+
+        if (messageType === 'response.created') {
+          if (import.meta.env.DEV) {
+            console.log('🚀 OpenAI response started')
+          }
+          if (isAISpeaking) {
+            audioPlaybackHook.stopPlayback()
           }
+          audioPlaybackHook.clearQueue()
+          awaitingAudioRef.current = true
 
-          // Mark session as ready when we get the confirmation
-          if (messageType === 'system' && message.message?.includes('OpenAI session ready')) {
-            sessionReadyRef.current = true
-            console.log('✅ OpenAI session is ready')
-            return
+          if (responseTimeoutRef.current) {
+            clearTimeout(responseTimeoutRef.current)
           }
+          responseTimeoutRef.current = setTimeout(() => {
+            if (awaitingAudioRef.current && !isAISpeaking) {
+              console.log('⚠️ No audio received from OpenAI within 3 seconds - resetting state')
+              awaitingAudioRef.current = false
+              requestStartTimeRef.current = 0 // Reset timing
 
-          if (messageType === 'response.created') {
-            if (import.meta.env.DEV) {
-              console.log('🚀 OpenAI response started')
-            }
-            if (isAISpeaking) {
-              audioPlaybackHook.stopPlayback()
-            }
-            audioPlaybackHook.clearQueue()
-            awaitingAudioRef.current = true
+              // CRITICAL FIX: Reset processing state on timeout
+              setIsProcessingRequest(false)
+              console.log('⏰ Timeout occurred - reset processing state for retry')
 
-            if (responseTimeoutRef.current) {
-              clearTimeout(responseTimeoutRef.current)
+              toast('Request timed out. You can try speaking again.', { icon: '⏰', duration: 1500 })
             }
-            responseTimeoutRef.current = setTimeout(() => {
-              if (awaitingAudioRef.current && !isAISpeaking) {
-                console.log('⚠️ No audio received from OpenAI within 3 seconds - resetting state')
-                awaitingAudioRef.current = false
-                requestStartTimeRef.current = 0 // Reset timing
+          }, 1500) // 1.5 s timeout for faster recovery
+        } else if (messageType === 'response.audio.delta') {
+          if (message.delta) {
+            handleAudioDelta(message.delta)
+          }
+        } else if (messageType === 'response.audio.done') {
+          if (import.meta.env.DEV) {
+            console.log('🎧 Audio response complete')
+          }
+          audioPlaybackHook.markStreamDone()
+        } else if (messageType === 'response.done') {
+          if (import.meta.env.DEV) {
+            console.log('✅ OpenAI response complete')
+          }
 
-                // CRITICAL FIX: Reset processing state on timeout
-                setIsProcessingRequest(false)
-                console.log('⏰ Timeout occurred - reset processing state for retry')
+          if (responseTimeoutRef.current) {
+            clearTimeout(responseTimeoutRef.current)
+            responseTimeoutRef.current = null
+          }
+          awaitingAudioRef.current = false
 
-                toast('Request timed out. You can try speaking again.', { icon: '⏰', duration: 1500 })
-              }
-            }, 1500) // 1.5 s timeout for faster recovery
-          } else if (messageType === 'response.audio.delta') {
-            if (message.delta) {
-              if (awaitingAudioRef.current) {
-                awaitingAudioRef.current = false
-                if (responseTimeoutRef.current) {
-                  clearTimeout(responseTimeoutRef.current)
-                  responseTimeoutRef.current = null
-                }
-
-                // Measure total latency from request to first audio
-                if (requestStartTimeRef.current > 0) {
-                  const totalLatency = performance.now() - requestStartTimeRef.current
-                  console.log(`⚡ TOTAL RESPONSE LATENCY: ${Math.round(totalLatency)} ms (target < 250 ms)`)
-                  if (totalLatency > 250) {
-                    console.warn(`⚠️ Latency above target! ${Math.round(totalLatency)} ms`)
-                  } else {
-                    console.log(`✅ Excellent latency! ${Math.round(totalLatency)} ms`)
-                  }
-                  requestStartTimeRef.current = 0 // Reset timer
-                }
-              }
-              audioPlaybackHook.addAudioChunk(message.delta)
-            }
-          } else if (messageType === 'response.audio.done') {
-            if (import.meta.env.DEV) {
-              console.log('🎧 Audio response complete')
-            }
-            audioPlaybackHook.markStreamDone()
-          } else if (messageType === 'response.done') {
-            if (import.meta.env.DEV) {
-              console.log('✅ OpenAI response complete')
-            }
+          // CRITICAL FIX: Reset processing state
+          setIsProcessingRequest(false)
+          console.log('✅ Request processing complete - ready for new requests')
 
+          if (message.response && import.meta.env.DEV) {
+            console.log('Full response:', message.response)
+          }
+        } else if (messageType === 'system') {
+          toast(message.message, { icon: 'ℹ️' })
+        } else if (messageType === 'error' && !message.function) {
+          console.error('❌ OpenAI Error:', message.error)
+          toast.error(`OpenAI Error: ${message.error?.message || 'Unknown error'}`)
+
+          // CRITICAL FIX: Reset processing state on errors
+          setIsProcessingRequest(false)
+          console.log('❌ Error occurred - reset processing state for retry')
+
+          // EMERGENCY RESET
+          if (message.emergency_reset) {
+            console.log('❗ Emergency timeout reset - clearing all states')
+            setIsAISpeaking(false)
+            awaitingAudioRef.current = false
             if (responseTimeoutRef.current) {
               clearTimeout(responseTimeoutRef.current)
               responseTimeoutRef.current = null
             }
-            awaitingAudioRef.current = false
-
-            // CRITICAL FIX: Reset processing state
-            setIsProcessingRequest(false)
-            console.log('✅ Request processing complete - ready for new requests')
-
-            if (message.response && import.meta.env.DEV) {
-              console.log('Full response:', message.response)
-            }
-          } else if (messageType === 'system') {
-            toast(message.message, { icon: 'ℹ️' })
-          } else if (messageType === 'error' && !message.function) {
-            console.error('❌ OpenAI Error:', message.error)
-            toast.error(`OpenAI Error: ${message.error?.message || 'Unknown error'}`)
-
-            // CRITICAL FIX: Reset processing state on errors
-            setIsProcessingRequest(false)
-            console.log('❌ Error occurred - reset processing state for retry')
-
-            // EMERGENCY RESET
-            if (message.emergency_reset) {
-              console.log('❗ Emergency timeout reset - clearing all states')
-              setIsAISpeaking(false)
-              awaitingAudioRef.current = false
-              if (responseTimeoutRef.current) {
-                clearTimeout(responseTimeoutRef.current)
-                responseTimeoutRef.current = null
-              }
-              requestStartTimeRef.current = 0
-              toast.error('Response timed out. Please try again.', { duration: 4000 })
-            }
+            requestStartTimeRef.current = 0
+            toast.error('Response timed out. Please try again.', { duration: 4000 })
           }
+        }
 
-          if (messageType === 'function_result') {
-            console.log('Function result:', message.function, message.result)
+        if (messageType === 'function_result') {
+          console.log('Function result:', message.function, message.result)
+        }
+      }
+
+      ws.onmessage = (event) => {
+        try {
+          // Binary frames carry response audio as raw PCM16
+          if (event.data instanceof ArrayBuffer) {
+            handleAudioDelta(event.data)
+          } else {
+            handleServerMessage(JSON.parse(event.data))
           }
         } catch (e) {
           console.error('Invalid WebSocket message', e)
@@ -117,22 +117,28 @@ export const useAudioPlayback = ({
   }, [onError])
   
   // Convert base64 PCM16 audio to AudioBuffer
-  const convertPCM16ToAudioBuffer = useCallback(async (base64Audio: string): Promise<AudioBuffer | null> => {
+  const convertPCM16ToAudioBuffer = useCallback(async (audio: string | ArrayBuffer): Promise<AudioBuffer | null> => {
     if (!audioContextRef.current) {
       console.error('No audio context available for conversion')
       return null
     }
     
     try {
-      // Decode base64 to binary
-      const binaryString = atob(base64Audio)
-      const bytes = new Uint8Array(binaryString.length)
-      for (let i = 0; i < binaryString.length; i++) {
-        bytes[i] = binaryString.charCodeAt(i)
+      // Binary frames are already raw PCM16; JSON events carry it base64-encoded
+      let pcm: ArrayBuffer
+      if (typeof audio === 'string') {
+        const binaryString = atob(audio)
+        const bytes = new Uint8Array(binaryString.length)
+        for (let i = 0; i < binaryString.length; i++) {
+          bytes[i] = binaryString.charCodeAt(i)
+        }
+        pcm = bytes.buffer
+      } else {
+        pcm = audio
       }
       
       // Convert to 16-bit samples
-      const samples = new Int16Array(bytes.buffer)
+      const samples = new Int16Array(pcm)
       
       // OpenAI sends 24kHz, check if we need resampling
       const openAISampleRate = 24000
@@ -314,7 +320,7 @@ export const useAudioPlayback = ({
   }, [onPlaybackStart, onPlaybackEnd, onError])
   
   // Add audio chunk to playback queue with session safety
-  const addAudioChunk = useCallback(async (base64Audio: string, sessionId?: string) => {
+  const addAudioChunk = useCallback(async (audio: string | ArrayBuffer, sessionId?: string) => {
     // Session safety check to prevent cross-contamination
     if (sessionId && sessionId !== currentSessionRef.current) {
       console.warn(`⚠️ Ignoring audio chunk from different session: ${sessionId} vs ${currentSessionRef.current}`)
@@ -342,7 +348,7 @@ export const useAudioPlayback = ({
     }
     
     // Convert and queue audio
-    const audioBuffer = await convertPCM16ToAudioBuffer(base64Audio)
+    const audioBuffer = await convertPCM16ToAudioBuffer(audio)
     if (audioBuffer) {
       audioBufferQueueRef.current.push(audioBuffer)
       // Don't log every chunk - too noisy for streaming audio
@@ -11,16 +11,6 @@ const floatTo16BitPCM = (float32Array: Float32Array): Int16Array => {
   return int16Array
 }
 
-// Convert Int16Array to base64 string
-const int16ArrayToBase64 = (int16Array: Int16Array): string => {
-  const uint8Array = new Uint8Array(int16Array.buffer)
-  let binary = ''
-  for (let i = 0; i < uint8Array.length; i++) {
-    binary += String.fromCharCode(uint8Array[i])
-  }
-  return btoa(binary)
-}
-
 // Resample audio from source rate to target rate
 const resampleAudio = (audioData: Float32Array, sourceRate: number, targetRate: number): Float32Array => {
   if (sourceRate === targetRate) return audioData
@@ -200,15 +190,12 @@ export const useContinuousVoiceCapture = ({
     const sampleRate = audioContextRef.current?.sampleRate || 24000
     const resampled = sampleRate === 24000 ? combined : resampleAudio(combined, sampleRate, 24000)
     
-    // Convert to PCM16 and base64
+    // Convert to PCM16
     const pcm16 = floatTo16BitPCM(resampled)
-    const base64 = int16ArrayToBase64(pcm16)
     
-    // Send via WebSocket ONLY when active
-    wsRef.current.send(JSON.stringify({
-      type: "input_audio_buffer.append",
-      audio: base64
-    }))
+    // Send via WebSocket ONLY when active - as a binary frame, the backend
+    // treats binary frames as raw PCM16 audio (no base64/JSON overhead)
+    wsRef.current.send(pcm16.buffer)
   }, [isMuted, enableWakeWord, isActive, wsRef, isAISpeaking, chunkDurationMs])
 
   // Fallback recording using deprecated ScriptProcessor